@@ -0,0 +1,30 @@
+from django.core.cache import cache
+
+from posts.models import Group
+
+from .utils import instrumented, lazy
+
+NAV_GROUPS_CACHE_KEY = 'core:nav_groups'
+NAV_GROUPS_TIMEOUT = 5 * 60
+# Остальные группы - в каталоге групп.
+NAV_GROUPS_LIMIT = 20
+
+
+def get_nav_groups():
+    """Список групп для навигации: из кэша или одним запросом."""
+    return cache.get_or_set(
+        NAV_GROUPS_CACHE_KEY,
+        lambda: list(
+            Group.objects.order_by('title').values('title', 'slug')
+            [:NAV_GROUPS_LIMIT]
+        ),
+        NAV_GROUPS_TIMEOUT,
+    )
+
+
+@instrumented
+def groups(request):
+    """Добавляет список групп, который загружается только по требованию."""
+    return {
+        'nav_groups': lazy(request, 'nav_groups', get_nav_groups),
+    }
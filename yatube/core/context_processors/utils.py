@@ -0,0 +1,57 @@
+import time
+from functools import wraps
+
+from django.utils.functional import SimpleLazyObject
+
+
+def record_cost(request, name, started):
+    """Добавляет время работы контекст-процессора к статистике запроса."""
+    costs = getattr(request, 'context_processor_costs', None)
+    if costs is None:
+        costs = request.context_processor_costs = {}
+    costs[name] = costs.get(name, 0) + time.perf_counter() - started
+
+
+def memoize(ttl):
+    """Запоминает результат функции без аргументов на ttl секунд.
+
+    Значение хранится в памяти процесса, поэтому подходит только
+    для дешёвых данных, не зависящих от запроса.
+    """
+    def decorator(func):
+        state = {}
+
+        @wraps(func)
+        def wrapper():
+            now = time.monotonic()
+            if state.get('expires', 0) <= now:
+                state['value'] = func()
+                state['expires'] = now + ttl
+            return state['value']
+
+        wrapper.cache_clear = state.clear
+        return wrapper
+    return decorator
+
+
+def instrumented(processor):
+    """Замеряет время работы контекст-процессора."""
+    @wraps(processor)
+    def wrapper(request):
+        started = time.perf_counter()
+        try:
+            return processor(request)
+        finally:
+            record_cost(request, processor.__name__, started)
+    return wrapper
+
+
+def lazy(request, name, func):
+    """Откладывает вычисление значения до первого обращения в шаблоне."""
+    def evaluate():
+        started = time.perf_counter()
+        try:
+            return func()
+        finally:
+            record_cost(request, name, started)
+    return SimpleLazyObject(evaluate)
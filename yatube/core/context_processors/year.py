@@ -1,9 +1,16 @@
 from datetime import datetime
 
+from .utils import instrumented, memoize
 
+
+@memoize(ttl=60)
+def current_year():
+    return datetime.now().year
+
+
+@instrumented
 def year(request):
     """Добавляет переменную с текущим годом."""
-    dt = int(datetime.now().year)
     return {
-        'year': dt,
+        'year': current_year(),
     }
@@ -0,0 +1,233 @@
+# Счётчики, приращения которых копятся в кэше и переносятся в базу
+# пачками.
+#
+# Частые события (лайки, просмотры) не должны превращаться в поток
+# UPDATE одной горячей строки на единственном писателе SQLite. Каждое
+# событие - одна операция incr в кэше, а flush() раз в несколько секунд
+# переносит накопленное одним UPDATE с CASE на пачку объектов.
+#
+# Буфер делится на поколения. События пишутся в текущее поколение;
+# flush() открывает новое и переносит в базу только поколения, которые
+# были закрыты ещё предыдущим flush(): приращение, записанное прямо
+# в момент смены поколения, так не теряется. Первое событие объекта
+# в поколении попадает в журнал поколения, по нему flush() узнаёт,
+# какие объекты менялись.
+#
+# Буфер живёт в отдельном кэше settings.COUNTER_CACHE_ALIAS: ему нужен
+# общий для процессов кэш без вытеснения (Redis), а вытеснение записей
+# сессий и страниц из общего кэша не должно задевать счётчики. Если
+# приращение всё же пропало, счётчик с recount не расходится с данными:
+# при сбросе его значение пересчитывается по самим строкам (лайкам).
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from .jobs import start_job
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'counters:{}:'
+# Сколько секунд flush() держит блокировку от параллельного сброса.
+LOCK_TIMEOUT = 5 * 60
+
+
+def get_cache():
+    return caches[settings.COUNTER_CACHE_ALIAS]
+
+
+def incr(key, delta=1):
+    """Атомарно прибавляет delta к числу в кэше, создавая его при нужде."""
+    cache = get_cache()
+    if cache.add(key, delta, None):
+        return delta
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Ключ успели удалить или вытеснить между add и incr.
+        cache.add(key, 0, None)
+        return cache.incr(key, delta)
+
+
+def add_to_field(model, field, deltas):
+    """Прибавляет deltas[pk] к полю field объектов одним UPDATE.
+
+    Счётчик не опускается ниже нуля, даже если часть приращений
+    пропала из кэша.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+    increment = Case(
+        *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return model._base_manager.filter(pk__in=deltas).update(
+        **{field: Greatest(F(field) + increment, 0)}
+    )
+
+
+def set_field(model, field, values, pks):
+    """Записывает values[pk] в поле field объектов pks одним UPDATE.
+
+    Объектам, которых нет в values, записывается 0.
+    """
+    if not pks:
+        return 0
+    value = Case(
+        *[When(pk=pk, then=Value(count)) for pk, count in values.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return model._base_manager.filter(pk__in=pks).update(**{field: value})
+
+
+def create_missing(model, pks):
+    """Создаёт строки счётчиков для pks, которых ещё нет в таблице.
+
+    Если первичный ключ model - ссылка на другую модель (как у
+    статистики профиля), строки создаются только для существующих
+    объектов этой модели.
+    """
+    target = model._meta.pk.related_model
+    if target is not None:
+        pks = target._base_manager.filter(pk__in=pks).values_list(
+            'pk', flat=True
+        )
+    model._base_manager.bulk_create(
+        [model(pk=pk) for pk in pks], ignore_conflicts=True
+    )
+
+
+class BufferedCounter:
+    """Счётчик поля field модели model с буфером в кэше.
+
+    С create=True строки model создаются при первом сбросе, например
+    для статистики, которая заводится не для каждого объекта.
+    recount(pks) возвращает точные значения {pk: число} (например, COUNT(*)
+    лайков): тогда сброс записывает их вместо накопленных приращений.
+    До следующего сброса к точному значению прибавляются приращения
+    открытых поколений, так что показанное число может ненадолго
+    опережать базу.
+    """
+
+    def __init__(self, name, model, field, chunk_size=500, create=False,
+                 recount=None):
+        self.name = name
+        self.model = model
+        self.field = field
+        self.chunk_size = chunk_size
+        self.create = create
+        self.recount = recount
+        self.prefix = KEY_PREFIX.format(name)
+
+    def key(self, *parts):
+        return self.prefix + ':'.join(str(part) for part in parts)
+
+    def generations(self):
+        """Номер текущего поколения и последнего перенесённого в базу."""
+        gen_key, flushed_key = self.key('gen'), self.key('flushed')
+        values = get_cache().get_many([gen_key, flushed_key])
+        return values.get(gen_key, 1), values.get(flushed_key, 0)
+
+    def add(self, pk, delta=1):
+        gen = self.generations()[0]
+        cache = get_cache()
+        if cache.add(self.key(gen, pk), delta, None):
+            # Первое событие объекта в поколении - записываем в журнал.
+            number = incr(self.key(gen, 'log'))
+            cache.set(self.key(gen, 'log', number), pk, None)
+        else:
+            incr(self.key(gen, pk), delta)
+        self.flush_soon()
+
+    def pending(self, pks):
+        """Ещё не перенесённые в базу приращения: {pk: delta}."""
+        gen, flushed = self.generations()
+        keys = {
+            self.key(number, pk): pk
+            for number in range(flushed + 1, gen + 1) for pk in pks
+        }
+        result = {}
+        for key, delta in get_cache().get_many(keys).items():
+            result[keys[key]] = result.get(keys[key], 0) + delta
+        return result
+
+    def attach(self, objs):
+        """Прибавляет к полю объектов objs их приращения из буфера."""
+        pending = self.pending([obj.pk for obj in objs])
+        for obj in objs:
+            setattr(obj, self.field, getattr(obj, self.field)
+                    + pending.get(obj.pk, 0))
+        return objs
+
+    def flush_soon(self):
+        """Запускает flush() в фоне не чаще раза в COUNTER_FLUSH_INTERVAL."""
+        due = get_cache().add(
+            self.key('due'), 1, settings.COUNTER_FLUSH_INTERVAL
+        )
+        if due:
+            start_job(f'Сброс счётчика {self.name}', self.run_flush)
+
+    def run_flush(self, job):
+        job.advance(self.flush())
+
+    def flush(self):
+        """Переносит в базу закрытые поколения, возвращает число объектов."""
+        cache = get_cache()
+        if not cache.add(self.key('lock'), 1, LOCK_TIMEOUT):
+            return 0
+        try:
+            gen, flushed = self.generations()
+            cache.set(self.key('gen'), gen + 1, None)
+            updated = 0
+            # Поколение gen только что закрыто: в него ещё могут писать
+            # запросы, прочитавшие старый номер. Его перенесёт следующий
+            # flush().
+            for number in range(flushed + 1, gen):
+                updated += self.flush_generation(number)
+                cache.set(self.key('flushed'), number, None)
+            return updated
+        finally:
+            cache.delete(self.key('lock'))
+
+    def flush_generation(self, gen):
+        cache = get_cache()
+        size = cache.get(self.key(gen, 'log'), 0)
+        updated = 0
+        for start in range(1, size + 1, self.chunk_size):
+            log_keys = [
+                self.key(gen, 'log', number)
+                for number in range(start, min(start + self.chunk_size,
+                                               size + 1))
+            ]
+            pks = cache.get_many(log_keys).values()
+            delta_keys = {self.key(gen, pk): pk for pk in pks}
+            deltas = {
+                delta_keys[key]: delta
+                for key, delta in cache.get_many(delta_keys).items()
+            }
+            with transaction.atomic():
+                if self.create:
+                    create_missing(self.model, list(deltas))
+                if self.recount is not None:
+                    # Список объектов - из журнала: приращение могло
+                    # пропасть, а объект всё равно нужно пересчитать.
+                    pks = list(delta_keys.values())
+                    updated += set_field(
+                        self.model, self.field, self.recount(pks), pks
+                    )
+                else:
+                    updated += add_to_field(self.model, self.field, deltas)
+            cache.delete_many(log_keys + list(delta_keys))
+        cache.delete(self.key(gen, 'log'))
+        if size:
+            logger.debug(
+                'Счётчик %s: поколение %s, объектов %s', self.name, gen,
+                updated,
+            )
+        return updated
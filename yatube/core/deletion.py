@@ -0,0 +1,43 @@
+from django.contrib import messages
+
+
+class BackgroundDeleteAdminMixin:
+    """Удаление объектов из админки фоновой задачей.
+
+    Стандартное удаление загружает все связанные строки, чтобы показать
+    их на странице подтверждения и удалить в одной транзакции. Здесь
+    страница подтверждения показывает только сами объекты, а удаление
+    выполняет функция schedule_deletion(obj), которую админка задаёт
+    атрибутом класса: schedule_deletion = staticmethod(...).
+    """
+
+    schedule_deletion = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(cls.schedule_deletion):
+            raise TypeError(
+                f'{cls.__name__}: задайте schedule_deletion - функцию, '
+                f'которая ставит удаление объекта в фон.'
+            )
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        opts = self.model._meta
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(opts.verbose_name)
+        model_count = {opts.verbose_name_plural: len(objs)}
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        self.schedule_deletion(obj)
+        self.message_user(
+            request,
+            f'«{obj}» скрыт, связанные данные удаляются в фоне.',
+            messages.INFO,
+        )
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.schedule_deletion(obj)
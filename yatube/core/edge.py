@@ -0,0 +1,120 @@
+# Кэширование страниц для анонимных пользователей на обратном прокси.
+#
+# Прокси (nginx, Varnish, CDN) кэширует ответы с Cache-Control: public
+# и s-maxage. Запросы с cookie сессии прокси должен пропускать мимо
+# кэша: залогиненным пользователям страницы отдаются с private.
+# Заголовок Surrogate-Key перечисляет объекты, из которых собрана
+# страница; при их изменении purge() сбрасывает такие страницы в прокси.
+import copy
+import logging
+import urllib.parse
+import urllib.request
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_cache_key
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def edge_cache(view_func):
+    """Разрешает прокси кэшировать GET-ответы view для анонимов."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD'):
+            response.edge_cacheable = True
+        return response
+    return wrapper
+
+
+def set_surrogate_keys(response, *keys):
+    response['Surrogate-Key'] = ' '.join(str(key) for key in keys if key)
+    return response
+
+
+def is_anonymous_request(request):
+    return settings.SESSION_COOKIE_NAME not in request.COOKIES
+
+
+def remove_vary_cookie(response):
+    if not response.has_header('Vary'):
+        return
+    headers = [
+        header.strip() for header in response['Vary'].split(',')
+        if header.strip().lower() != 'cookie'
+    ]
+    if headers:
+        response['Vary'] = ', '.join(headers)
+    else:
+        del response['Vary']
+
+
+class EdgeCacheMiddleware:
+    """Выставляет Cache-Control для ответов, помеченных edge_cache.
+
+    Должен стоять первым в MIDDLEWARE, чтобы видеть заголовки, которые
+    добавили SessionMiddleware и CsrfViewMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not getattr(response, 'edge_cacheable', False):
+            return response
+        if (response.status_code == 200 and not response.cookies
+                and is_anonymous_request(request)):
+            remove_vary_cookie(response)
+            response['Cache-Control'] = (
+                f'public, max-age=0, s-maxage={settings.EDGE_CACHE_SECONDS}'
+            )
+        else:
+            response['Cache-Control'] = 'private, max-age=0'
+            if response.has_header('Surrogate-Key'):
+                del response['Surrogate-Key']
+        return response
+
+
+def http_purge(keys):
+    """Отправляет прокси запрос PURGE с заголовком Surrogate-Key."""
+    request = urllib.request.Request(
+        settings.EDGE_PURGE_URL,
+        method='PURGE',
+        headers={'Surrogate-Key': ' '.join(keys)},
+    )
+    try:
+        urllib.request.urlopen(request, timeout=2).close()
+    except OSError:
+        logger.warning('Не удалось сбросить кэш прокси: %s', keys)
+
+
+def purge(*keys):
+    """Сбрасывает в прокси страницы с этими ключами после коммита."""
+    keys = sorted({str(key) for key in keys if key})
+    if not keys or not settings.EDGE_PURGE_URL:
+        return
+    backend = import_string(settings.EDGE_PURGE_BACKEND)
+    transaction.on_commit(lambda: backend(keys))
+
+
+def drop_cached_page(request, url):
+    """Удаляет из кэша cache_page страницу url, как её видит request.
+
+    Кэш страницы различается по cookie, так что удаляется только копия
+    этого пользователя: после своего действия он не увидит страницу
+    в состоянии до него.
+    """
+    parts = urllib.parse.urlsplit(url)
+    page_request = copy.copy(request)
+    page_request.path = page_request.path_info = parts.path
+    page_request.META = {**request.META, 'QUERY_STRING': parts.query}
+    cache = caches[settings.CACHE_MIDDLEWARE_ALIAS]
+    for method in ('GET', 'HEAD'):
+        key = get_cache_key(page_request, method=method, cache=cache)
+        if key is not None:
+            cache.delete(key)
@@ -0,0 +1,103 @@
+# Фоновые задачи в потоке процесса.
+#
+# Задача выполняется в отдельном потоке воркера, её состояние лежит
+# в кэше: при нескольких процессах нужен общий кэш (CACHE_BACKEND),
+# иначе страница прогресса может попасть в другой процесс. Поток
+# умирает вместе с воркером, поэтому задачи должны быть идемпотентными:
+# прерванную задачу можно просто запустить ещё раз.
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+JOB_CACHE_KEY = 'core:job:{}'
+# Сколько секунд хранить состояние задачи.
+JOB_TIMEOUT = 24 * 60 * 60
+
+
+class Job:
+    """Состояние фоновой задачи: статус и число обработанных объектов."""
+
+    def __init__(self, name, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.name = name
+        self.status = 'queued'
+        self.done = 0
+        self.total = None
+        self.error = ''
+        self.started = timezone.now()
+        self.finished = None
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'done': self.done,
+            'total': self.total,
+            'error': self.error,
+            'started': self.started.isoformat(),
+            'finished': self.finished and self.finished.isoformat(),
+        }
+
+    def save(self):
+        cache.set(JOB_CACHE_KEY.format(self.id), self.as_dict(), JOB_TIMEOUT)
+
+    def advance(self, count):
+        self.done += count
+        self.save()
+
+    def run(self, func, *args, **kwargs):
+        self.status = 'running'
+        self.save()
+        try:
+            func(self, *args, **kwargs)
+        except Exception as error:
+            logger.exception('Задача %s (%s) упала', self.name, self.id)
+            self.status = 'failed'
+            self.error = str(error)
+        else:
+            self.status = 'done'
+        finally:
+            self.finished = timezone.now()
+            self.save()
+
+    def run_in_thread(self, func, *args, **kwargs):
+        try:
+            self.run(func, *args, **kwargs)
+        finally:
+            # Соединения с базой у каждого потока свои, и закрыть их
+            # за поток никто не сможет.
+            connections.close_all()
+
+
+def start_job(name, func, *args, **kwargs):
+    """Запускает func(job, *args, **kwargs) в фоне, возвращает Job.
+
+    Поток стартует после коммита текущей транзакции. С настройкой
+    BACKGROUND_JOBS_SYNC задача выполняется сразу (для тестов).
+    """
+    job = Job(name)
+    job.save()
+    if settings.BACKGROUND_JOBS_SYNC:
+        job.run(func, *args, **kwargs)
+        return job
+
+    def start():
+        threading.Thread(
+            target=job.run_in_thread, args=(func, *args), kwargs=kwargs,
+            name=f'job-{job.id}', daemon=True,
+        ).start()
+
+    transaction.on_commit(start)
+    return job
+
+
+def get_job(job_id):
+    return cache.get(JOB_CACHE_KEY.format(job_id))
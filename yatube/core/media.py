@@ -0,0 +1,60 @@
+import re
+
+from django.conf import settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+# Год: для файлов, имя которых меняется вместе с содержимым.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def parse_range(header, size):
+    """Разбирает заголовок Range с одним диапазоном.
+
+    Возвращает пару (start, end) включительно, None если заголовка нет
+    или он не поддерживается, и False если диапазон не попадает в файл.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # bytes=-500: последние 500 байт файла.
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def iter_file_range(file_obj, start, length):
+    """Читает из файла length байт начиная со start порциями."""
+    with file_obj:
+        file_obj.seek(start)
+        while length > 0:
+            chunk = file_obj.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def cache_control_for(path):
+    """Cache-Control для медиафайла.
+
+    Миниатюры sorl-thumbnail лежат в cache/ под именами-хэшами, поэтому
+    их можно кэшировать навсегда. Загруженные картинки постов могут
+    быть перезаписаны под тем же именем и кэшируются на MEDIA_MAX_AGE.
+    """
+    if path.startswith(thumbnail_settings.THUMBNAIL_PREFIX):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'public, max-age={settings.MEDIA_MAX_AGE}'
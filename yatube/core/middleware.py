@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+
+from .minify import minify_html
+
+
+class ServerTimingMiddleware:
+    """Отдаёт время работы контекст-процессоров в заголовке Server-Timing.
+
+    Значения в миллисекундах видны во вкладке Network инструментов
+    разработчика браузера.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        costs = getattr(request, 'context_processor_costs', None)
+        if costs:
+            metrics = ', '.join(
+                f'cp-{name};dur={seconds * 1000:.3f}'
+                for name, seconds in costs.items()
+            )
+            if response.has_header('Server-Timing'):
+                metrics = f"{response['Server-Timing']}, {metrics}"
+            response['Server-Timing'] = metrics
+        return response
+
+
+class HtmlMinifyMiddleware:
+    """Сжимает пробелы в HTML-ответах, если включён HTML_MINIFY.
+
+    Сэкономленные байты и время сжатия попадают в Server-Timing.
+    Потоковые ответы сжимает stream_render.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (not settings.HTML_MINIFY or response.streaming
+                or response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith(
+                    'text/html')):
+            return response
+        started = time.perf_counter()
+        content = response.content.decode(response.charset)
+        minified = minify_html(content).encode(response.charset)
+        saved = len(response.content) - len(minified)
+        response.content = minified
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(minified))
+        metric = (
+            f'minify;dur={(time.perf_counter() - started) * 1000:.3f};'
+            f'desc="saved {saved} bytes"'
+        )
+        if response.has_header('Server-Timing'):
+            metric = f"{response['Server-Timing']}, {metric}"
+        response['Server-Timing'] = metric
+        return response
@@ -0,0 +1,57 @@
+import re
+
+# Внутри этих тегов пробелы значимы, их содержимое не трогаем.
+PRESERVE_TAG_RE = re.compile(
+    r'<(/?)(pre|textarea|script|style)\b[^>]*>', re.IGNORECASE
+)
+# Условные комментарии <!--[if IE]> оставляем.
+COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def collapse_whitespace(text):
+    """Сжимает пробелы и удаляет HTML-комментарии.
+
+    Серия пробельных символов заменяется одним пробелом или одним
+    переводом строки, если он в ней был: браузер отображает оба
+    варианта одинаково.
+    """
+    text = COMMENT_RE.sub('', text)
+    return WHITESPACE_RE.sub(
+        lambda match: '\n' if '\n' in match.group() else ' ', text
+    )
+
+
+class HtmlMinifier:
+    """Сжимает HTML по частям, помня открытые pre/textarea/script/style.
+
+    Части можно подавать по мере рендеринга страницы, например при
+    потоковой отдаче: тег, открытый в одной части, закроется в другой.
+    """
+
+    def __init__(self):
+        self.preserved = None
+
+    def feed(self, text):
+        result = []
+        position = 0
+        for match in PRESERVE_TAG_RE.finditer(text):
+            closing, name = match.group(1), match.group(2).lower()
+            if self.preserved is None and not closing:
+                result.append(
+                    collapse_whitespace(text[position:match.start()])
+                )
+                result.append(match.group())
+                self.preserved = name
+                position = match.end()
+            elif closing and self.preserved == name:
+                result.append(text[position:match.end()])
+                self.preserved = None
+                position = match.end()
+        rest = text[position:]
+        result.append(rest if self.preserved else collapse_whitespace(rest))
+        return ''.join(result)
+
+
+def minify_html(text):
+    return HtmlMinifier().feed(text)
@@ -0,0 +1,160 @@
+# Ограничение частоты запросов счётчиком в фиксированном окне.
+#
+# Счётчик окна увеличивается атомарно (add, затем incr), поэтому
+# одновременные запросы не проскакивают сверх лимита. На стыке двух
+# окон клиент может успеть сделать до двух лимитов подряд.
+import logging
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+COUNTER_KEY = 'ratelimit:counter:{scope}:{result}'
+
+# Запасное хранилище окон на случай недоступности общего кэша.
+_local_windows = {}
+_local_counters = {}
+_local_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """Переводит строку вида '10/m' или '100/5m' в (запросы, секунды)."""
+    count, period = rate.split('/')
+    multiplier = int(period[:-1]) if period[:-1] else 1
+    return int(count), multiplier * PERIODS[period[-1]]
+
+
+def current_window(now, period):
+    """Номер окна для момента now и сколько секунд осталось до его конца."""
+    number = int(now // period)
+    return number, (number + 1) * period - now
+
+
+def hit(key, period):
+    """Засчитывает запрос в окне key, возвращает число запросов в нём."""
+    try:
+        if cache.add(key, 1, period):
+            return 1
+        return cache.incr(key)
+    except ValueError:
+        # Окно истекло между add и incr - запрос открывает новое.
+        cache.add(key, 0, period)
+        return cache.incr(key)
+
+
+def hit_window(key, capacity, period, now=None):
+    """Засчитывает запрос в текущем фиксированном окне key.
+
+    True - запросов в окне не больше capacity и запрос разрешён.
+    """
+    number, _ = current_window(time.time() if now is None else now, period)
+    try:
+        hits = hit(f'{key}:{number}', period)
+    except Exception:
+        logger.warning('Кэш недоступен, лимит %s считается локально', key)
+        with _local_lock:
+            window, hits = _local_windows.get(key, (number, 0))
+            hits = hits + 1 if window == number else 1
+            _local_windows[key] = (number, hits)
+    return hits <= capacity
+
+
+def count(scope, result):
+    """Увеличивает счётчик разрешённых или отклонённых запросов."""
+    key = COUNTER_KEY.format(scope=scope, result=result)
+    with _local_lock:
+        _local_counters[key] = _local_counters.get(key, 0) + 1
+    try:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+    except Exception:
+        pass
+
+
+def get_counters():
+    """Счётчики по всем ограничениям из settings.RATELIMITS."""
+    counters = {}
+    for scope in settings.RATELIMITS:
+        keys = {
+            result: COUNTER_KEY.format(scope=scope, result=result)
+            for result in ('allowed', 'limited')
+        }
+        try:
+            values = cache.get_many(keys.values())
+        except Exception:
+            values = _local_counters
+        counters[scope] = {
+            result: values.get(key, 0) for result, key in keys.items()
+        }
+    return counters
+
+
+def client_ip(request):
+    """IP клиента.
+
+    За обратным прокси REMOTE_ADDR - адрес прокси, и все клиенты
+    попали бы в одну корзину. Тогда адрес берётся из заголовка
+    settings.RATELIMIT_IP_HEADER (например, HTTP_X_FORWARDED_FOR):
+    из списка адресов - тот, что добавил самый дальний из
+    RATELIMIT_TRUSTED_PROXIES доверенных прокси. Адреса левее него
+    присылает сам клиент, им верить нельзя.
+    """
+    header = settings.RATELIMIT_IP_HEADER
+    if header:
+        addresses = [
+            address.strip()
+            for address in request.META.get(header, '').split(',')
+            if address.strip()
+        ]
+        if addresses:
+            proxies = max(1, settings.RATELIMIT_TRUSTED_PROXIES)
+            return addresses[-min(proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR')
+
+
+def client_keys(request, scope):
+    keys = [f'ratelimit:{scope}:ip:{client_ip(request)}']
+    if request.user.is_authenticated:
+        keys.append(f'ratelimit:{scope}:user:{request.user.pk}')
+    return keys
+
+
+def ratelimit(scope, methods=('POST',)):
+    """Ограничивает частоту запросов к view по пользователю и IP.
+
+    Лимит берётся из settings.RATELIMITS[scope], например '10/m' -
+    не больше 10 запросов в каждую минуту.
+    При превышении возвращается ответ 429 с заголовком Retry-After.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            rate = settings.RATELIMITS.get(scope)
+            if (not settings.RATELIMIT_ENABLED or rate is None
+                    or request.method not in methods):
+                return view_func(request, *args, **kwargs)
+            capacity, period = parse_rate(rate)
+            now = time.time()
+            allowed = all([
+                hit_window(key, capacity, period, now)
+                for key in client_keys(request, scope)
+            ])
+            if not allowed:
+                count(scope, 'limited')
+                response = render(
+                    request, 'core/429.html', {'period': period}, status=429
+                )
+                _, remaining = current_window(now, period)
+                response['Retry-After'] = str(max(1, math.ceil(remaining)))
+                return response
+            count(scope, 'allowed')
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,105 @@
+# Потоковая отдача страниц.
+#
+# Обычный render() собирает страницу целиком и только потом отдаёт
+# первый байт. stream_render() отдаёт страницу по узлам корневого
+# шаблона (base.html): <head> и шапка уходят клиенту сразу, браузер
+# начинает грузить стили, пока view выполняет запросы блока content.
+#
+# Ограничения: ответ не кэшируется cache_page, а ошибка при рендеринге
+# обрывает уже начатую страницу. Шаблон не должен показывать messages:
+# их middleware отрабатывает до рендеринга, поэтому режим включается
+# только для лент. По той же причине cookie с CSRF-токеном для форм
+# залогиненных пользователей (лайки) выдаётся до начала потока.
+import logging
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.loader import get_template
+from django.template.loader_tags import (
+    BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode
+)
+
+from .minify import HtmlMinifier
+
+logger = logging.getLogger(__name__)
+
+
+def _iter_extends(node, context):
+    """Повторяет ExtendsNode.render, отдавая родительский шаблон по узлам."""
+    parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    for parent_node in parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                block_context.add_blocks({
+                    block.name: block
+                    for block in parent.nodelist.get_nodes_by_type(BlockNode)
+                })
+            break
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from _iter_nodes(parent, context)
+
+
+def _iter_nodes(template, context):
+    # Всё, что идёт после {% extends %}, парсер кладёт внутрь ExtendsNode,
+    # поэтому на верхнем уровне остаются только текст перед ним и он сам.
+    for node in template.nodelist:
+        if isinstance(node, ExtendsNode):
+            yield from _iter_extends(node, context)
+        else:
+            yield node.render_annotated(context)
+
+
+def iter_template(template_name, context=None, request=None):
+    """Рендерит шаблон по частям: по одной на узел корневого шаблона."""
+    template = get_template(template_name).template
+    context = make_context(
+        context, request, autoescape=template.engine.autoescape
+    )
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            yield from _iter_nodes(template, context)
+
+
+def _iter_chunks(template_name, context, request):
+    # Потоковые ответы HtmlMinifyMiddleware не обрабатывает,
+    # поэтому части сжимаются здесь.
+    minifier = HtmlMinifier() if settings.HTML_MINIFY else None
+    try:
+        for chunk in iter_template(template_name, context, request):
+            if not chunk:
+                continue
+            yield minifier.feed(chunk) if minifier else chunk
+    except Exception:
+        logger.exception('Ошибка потокового рендеринга %s', template_name)
+        raise
+
+
+def stream_render(request, template_name, context=None):
+    # {% csrf_token %} отработает уже после CsrfViewMiddleware: без этого
+    # вызова страница получила бы токен без cookie, и POST формы - 403.
+    # Анонимам формы не показываются, а cookie сделал бы ответ
+    # некэшируемым для прокси.
+    if request.user.is_authenticated:
+        get_token(request)
+    response = StreamingHttpResponse(
+        _iter_chunks(template_name, context, request)
+    )
+    # Запрещаем nginx буферизовать ответ целиком.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def render_page(request, template_name, context=None):
+    """render() или stream_render() в зависимости от STREAMING_RENDER."""
+    if settings.STREAMING_RENDER:
+        return stream_render(request, template_name, context)
+    return render(request, template_name, context)
@@ -0,0 +1,454 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import clear_url_caches, get_resolver, reverse
+from django.utils.translation import get_language
+
+from posts.models import Comment, Group, Post
+
+from .context_processors.groups import groups
+from .counters import BufferedCounter, add_to_field, get_cache
+from .deletion import BackgroundDeleteAdminMixin
+from .context_processors.utils import memoize
+from .context_processors.year import year
+from .media import parse_range
+from .minify import HtmlMinifier, minify_html
+from .ratelimit import (
+    client_ip, get_counters, hit_window, parse_rate, ratelimit
+)
+from .streaming import iter_template
+from .warmup import (
+    HOT_URL_NAMES, iter_template_names, warm_up_templates, warm_up_urls
+)
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class WarmUpTests(TestCase):
+    def test_iter_template_names(self):
+        """Находятся шаблоны из вложенных каталогов templates/."""
+        names = list(iter_template_names(settings.TEMPLATES_DIR))
+        self.assertIn('base.html', names)
+        self.assertIn('posts/includes/post.html', names)
+
+    def test_warm_up_compiles_all_templates(self):
+        """Прогрев компилирует все шаблоны без ошибок."""
+        names = list(iter_template_names(settings.TEMPLATES_DIR))
+        self.assertEqual(warm_up_templates(), len(names))
+
+    def test_warm_up_urls(self):
+        """Все популярные URL-имена разрешаются."""
+        self.assertEqual(warm_up_urls(), len(HOT_URL_NAMES))
+
+    def test_warm_up_urls_fills_request_resolver(self):
+        """Прогревается резолвер, которым пользуются запросы."""
+        clear_url_caches()
+        warm_up_urls()
+        resolver = get_resolver(settings.ROOT_URLCONF)
+        self.assertIn(get_language(), resolver._reverse_dict)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_ACCEL_REDIRECT='')
+class ServeMediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'))
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'cache'))
+        for name in ('posts/image.jpg', 'cache/ab/thumb.jpg'):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(b'0123456789')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_serve_full_file(self):
+        """Файл отдаётся целиком с заголовками кэширования."""
+        response = self.guest_client.get('/media/posts/image.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_thumbnails_are_immutable(self):
+        """Миниатюры кэшируются навсегда."""
+        response = self.guest_client.get('/media/cache/ab/thumb.jpg')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_range_request(self):
+        """Запрос диапазона возвращает 206 и часть файла."""
+        response = self.guest_client.get(
+            '/media/posts/image.jpg', HTTP_RANGE='bytes=2-5'
+        )
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+
+    def test_unsatisfiable_range(self):
+        """Диапазон за пределами файла возвращает 416."""
+        response = self.guest_client.get(
+            '/media/posts/image.jpg', HTTP_RANGE='bytes=20-'
+        )
+        self.assertEqual(response.status_code, 416)
+
+    def test_not_modified(self):
+        """If-Modified-Since для неизменного файла возвращает 304."""
+        response = self.guest_client.get('/media/posts/image.jpg')
+        response = self.guest_client.get(
+            '/media/posts/image.jpg',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_and_outside_files(self):
+        """Несуществующий файл даёт 404, выход за MEDIA_ROOT - 400."""
+        response = self.guest_client.get('/media/posts/none.jpg')
+        self.assertEqual(response.status_code, 404)
+        response = self.guest_client.get('/media/../manage.py')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect(self):
+        """С MEDIA_ACCEL_REDIRECT файл отдаёт веб-сервер."""
+        response = self.guest_client.get('/media/posts/image.jpg')
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/image.jpg'
+        )
+        self.assertEqual(response.content, b'')
+
+    def test_parse_range(self):
+        """Разбор заголовка Range."""
+        self.assertEqual(parse_range('bytes=0-', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=-3', 10), (7, 9))
+        self.assertEqual(parse_range('bytes=5-100', 10), (5, 9))
+        self.assertIsNone(parse_range('bytes=0-1,3-4', 10))
+        self.assertIs(parse_range('bytes=10-', 10), False)
+
+
+class ContextProcessorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/')
+
+    def test_memoize(self):
+        """Результат запоминается до истечения ttl."""
+        calls = []
+
+        @memoize(ttl=60)
+        def value():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(value(), 1)
+        self.assertEqual(value(), 1)
+        value.cache_clear()
+        self.assertEqual(value(), 2)
+
+    def test_year_cost_is_recorded(self):
+        """Время работы процессора year записывается в запрос."""
+        self.assertIn('year', year(self.request))
+        self.assertIn('year', self.request.context_processor_costs)
+
+    def test_groups_are_lazy(self):
+        """Список групп загружается только при обращении к нему."""
+        Group.objects.create(title='Группа', slug='group', description='-')
+        with self.assertNumQueries(0):
+            context = groups(self.request)
+        with self.assertNumQueries(1):
+            self.assertEqual(context['nav_groups'][0]['slug'], 'group')
+        with self.assertNumQueries(0):
+            groups(self.request)['nav_groups'][0]
+        self.assertIn('nav_groups', self.request.context_processor_costs)
+
+    def test_nav_groups_on_group_page(self):
+        """Страница группы показывает ссылки на другие группы."""
+        group = Group.objects.create(
+            title='Группа', slug='group', description='-'
+        )
+        other = Group.objects.create(
+            title='Другая', slug='other', description='-'
+        )
+        other_url = reverse('posts:group_list', args=[other.slug])
+        response = Client().get(
+            reverse('posts:group_list', args=[group.slug])
+        )
+        self.assertContains(response, f'href="{other_url}"')
+        response = Client().get('/about/author/')
+        self.assertNotContains(response, f'href="{other_url}"')
+
+    def test_server_timing_header(self):
+        """Страница содержит заголовок Server-Timing."""
+        response = Client().get('/about/author/')
+        self.assertIn('cp-year;dur=', response['Server-Timing'])
+
+
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user('User')
+        cls.post = Post.objects.create(text='Текст поста', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+        # Время внутри одного окна: тест не зависит от смены минуты.
+        patcher = mock.patch('core.ratelimit.time')
+        patcher.start().time.return_value = 620.0
+        self.addCleanup(patcher.stop)
+
+    def test_parse_rate(self):
+        """Разбор строки лимита."""
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('100/5m'), (100, 300))
+        self.assertEqual(parse_rate('1/d'), (1, 86400))
+
+    def test_window_resets(self):
+        """В окне не больше лимита запросов, новое окно начинает счёт."""
+        self.assertTrue(hit_window('ratelimit:test', 2, 60, now=0))
+        self.assertTrue(hit_window('ratelimit:test', 2, 60, now=30))
+        self.assertFalse(hit_window('ratelimit:test', 2, 60, now=59))
+        self.assertTrue(hit_window('ratelimit:test', 2, 60, now=61))
+
+    def test_client_ip(self):
+        """IP берётся из заголовка прокси, только если он настроен."""
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR='10.0.0.1',
+            HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2, 3.3.3.3',
+        )
+        cases = [
+            ('', 1, '10.0.0.1'),
+            ('HTTP_X_FORWARDED_FOR', 1, '3.3.3.3'),
+            ('HTTP_X_FORWARDED_FOR', 2, '2.2.2.2'),
+            ('HTTP_X_FORWARDED_FOR', 5, '1.1.1.1'),
+            ('HTTP_X_REAL_IP', 1, '10.0.0.1'),
+        ]
+        for header, proxies, expected in cases:
+            with self.subTest(header=header, proxies=proxies):
+                with override_settings(
+                    RATELIMIT_IP_HEADER=header,
+                    RATELIMIT_TRUSTED_PROXIES=proxies,
+                ):
+                    self.assertEqual(client_ip(request), expected)
+
+    @override_settings(
+        RATELIMITS={'test': '1/m'}, RATELIMIT_IP_HEADER='HTTP_X_REAL_IP'
+    )
+    def test_clients_behind_proxy_are_limited_separately(self):
+        """За прокси у разных клиентов разные счётчики."""
+        view = ratelimit('test')(lambda request: HttpResponse())
+        statuses = []
+        for address in ('1.1.1.1', '2.2.2.2', '1.1.1.1'):
+            request = RequestFactory().post(
+                '/', REMOTE_ADDR='10.0.0.1', HTTP_X_REAL_IP=address
+            )
+            request.user = AnonymousUser()
+            statuses.append(view(request).status_code)
+        self.assertEqual(statuses, [200, 200, 429])
+
+    @override_settings(RATELIMITS={'add_comment': '2/m'})
+    def test_comments_are_limited(self):
+        """Сверх лимита комментарии не создаются, ответ - 429."""
+        url = reverse('posts:add_comment', args=[self.post.id])
+        responses = [
+            self.user_client.post(url, {'text': f'Коммент {i}'})
+            for i in range(3)
+        ]
+        self.assertEqual(
+            [response.status_code for response in responses], [302, 302, 429]
+        )
+        self.assertEqual(Comment.objects.count(), 2)
+        # До конца минутного окна осталось 40 секунд.
+        self.assertEqual(responses[-1]['Retry-After'], '40')
+        self.assertEqual(
+            get_counters()['add_comment'], {'allowed': 2, 'limited': 1}
+        )
+
+    @override_settings(RATELIMITS={'post_create': '1/m'})
+    def test_get_requests_are_not_limited(self):
+        """GET-запросы к форме создания поста не ограничиваются."""
+        for _ in range(3):
+            response = self.user_client.get(reverse('posts:post_create'))
+            self.assertEqual(response.status_code, 200)
+
+
+class StreamingRenderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user('User')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(
+            text='Текст поста', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_streamed_page_equals_rendered(self):
+        """Потоковый ответ совпадает с обычным, шапка идёт отдельно."""
+        # Страница группы: на профиле меняется счётчик посещений.
+        url = reverse('posts:group_list', args=[self.group.slug])
+        rendered = self.guest_client.get(url).content
+        with override_settings(STREAMING_RENDER=True):
+            response = self.guest_client.get(url)
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        self.assertEqual(b''.join(chunks), rendered)
+        header_chunk = next(
+            i for i, chunk in enumerate(chunks) if b'</header>' in chunk
+        )
+        post_chunk = next(
+            i for i, chunk in enumerate(chunks)
+            if 'Текст поста'.encode() in chunk
+        )
+        self.assertLess(header_chunk, post_chunk)
+
+    def test_streamed_page_sets_csrf_cookie(self):
+        """Форма лайка на потоковой странице отправляется без 403."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        url = reverse('posts:group_list', args=[self.group.slug])
+        with override_settings(STREAMING_RENDER=True):
+            response = client.get(url)
+            b''.join(response.streaming_content)
+        token = response.cookies[settings.CSRF_COOKIE_NAME].value
+        post = Post.objects.get()
+        response = client.post(
+            reverse('posts:post_like', args=[post.pk]),
+            {'csrfmiddlewaretoken': token},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_iter_template_without_extends(self):
+        """Шаблон без extends отдаётся по своим узлам."""
+        chunks = list(iter_template('includes/footer.html'))
+        self.assertGreater(len(chunks), 0)
+
+    def test_minify_html(self):
+        """Пробелы сжимаются, комментарии удаляются, pre не трогается."""
+        html = '<p>\n    a   b <!-- комментарий --></p><pre>  x\n  y</pre>'
+        self.assertEqual(minify_html(html), '<p>\na b </p><pre>  x\n  y</pre>')
+
+    def test_minifier_keeps_state_between_chunks(self):
+        """Тег textarea, открытый в одной части, действует в следующей."""
+        minifier = HtmlMinifier()
+        self.assertEqual(minifier.feed('<textarea>  a'), '<textarea>  a')
+        self.assertEqual(
+            minifier.feed('  b</textarea>  c'), '  b</textarea> c'
+        )
+
+    @override_settings(HTML_MINIFY=True)
+    def test_minify_middleware(self):
+        """Сжатая страница меньше, экономия видна в Server-Timing."""
+        url = reverse('posts:profile', args=[self.user.username])
+        with override_settings(HTML_MINIFY=False):
+            raw = self.guest_client.get(url).content
+        response = self.guest_client.get(url)
+        self.assertLess(len(response.content), len(raw))
+        self.assertIn('minify;dur=', response['Server-Timing'])
+
+
+class BufferedCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user('User')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.user)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        get_cache().clear()
+        self.counter = BufferedCounter('test', Post, 'likes_count')
+
+    def likes(self):
+        return list(
+            Post.objects.order_by('pk').values_list('likes_count', flat=True)
+        )
+
+    def test_add_to_field(self):
+        """Приращения разных объектов пишутся одним запросом, не ниже 0."""
+        first, second, third = self.posts
+        with self.assertNumQueries(1):
+            add_to_field(Post, 'likes_count', {
+                first.pk: 3, second.pk: -1, third.pk: 0,
+            })
+        self.assertEqual(self.likes(), [3, 0, 0])
+
+    def test_pending_and_flush(self):
+        """Буфер виден сразу, в базу попадает после закрытия поколения."""
+        first, second, _ = self.posts
+        for _ in range(5):
+            self.counter.add(first.pk)
+        self.counter.add(second.pk, 2)
+        self.counter.add(second.pk, -1)
+        self.assertEqual(
+            self.counter.pending([first.pk, second.pk]),
+            {first.pk: 5, second.pk: 1},
+        )
+        # Первый сброс только закрывает текущее поколение.
+        self.assertEqual(self.counter.flush(), 0)
+        self.counter.add(first.pk)
+        self.assertEqual(self.counter.pending([first.pk]), {first.pk: 6})
+        with self.assertNumQueries(3):
+            self.assertEqual(self.counter.flush(), 2)
+        self.assertEqual(self.likes(), [5, 1, 0])
+        self.assertEqual(self.counter.pending([first.pk]), {first.pk: 1})
+        self.counter.flush()
+        self.assertEqual(self.likes(), [6, 1, 0])
+        self.assertEqual(self.counter.pending([first.pk]), {})
+
+        posts = self.counter.attach(list(Post.objects.order_by('pk')))
+        self.assertEqual([post.likes_count for post in posts], [6, 1, 0])
+
+    def test_recount_replaces_deltas(self):
+        """Со recount сброс записывает точные значения, а не приращения."""
+        first, second, _ = self.posts
+        counter = BufferedCounter(
+            'recount', Post, 'likes_count',
+            recount=lambda pks: {first.pk: 7},
+        )
+        counter.add(first.pk)
+        counter.add(second.pk, 3)
+        counter.flush()
+        counter.flush()
+        self.assertEqual(self.likes(), [7, 0, 0])
+
+
+class BackgroundDeleteAdminTests(TestCase):
+    def test_schedule_deletion_required(self):
+        """Админка без функции удаления не объявляется."""
+        with self.assertRaises(TypeError):
+            type('BrokenAdmin', (BackgroundDeleteAdminMixin,), {})
+
+        def schedule(obj):
+            return obj
+
+        admin_class = type('Admin', (BackgroundDeleteAdminMixin,), {
+            'schedule_deletion': staticmethod(schedule),
+        })
+        self.assertEqual(admin_class().schedule_deletion('obj'), 'obj')
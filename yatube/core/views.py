@@ -1,4 +1,20 @@
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+    JsonResponse, StreamingHttpResponse
+)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .media import cache_control_for, iter_file_range, parse_range
+from .ratelimit import get_counters
 
 
 def page_not_found(request, exception):
@@ -11,3 +27,67 @@ def csrf_failure(request, reason=''):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+@staff_member_required
+def ratelimit_stats(request):
+    """Счётчики разрешённых и отклонённых запросов для мониторинга."""
+    return JsonResponse(get_counters())
+
+
+def serve_media(request, path):
+    """Отдаёт загруженные файлы из MEDIA_ROOT.
+
+    Если задан MEDIA_ACCEL_REDIRECT, сам файл отдаёт nginx
+    (X-Accel-Redirect, sendfile без копирования через Python).
+    Иначе файл отдаётся через FileResponse, который WSGI-сервер
+    передаёт в wsgi.file_wrapper. Поддерживаются If-Modified-Since
+    и запросы с одним диапазоном Range.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    fullpath = safe_join(settings.MEDIA_ROOT, path)
+    if not os.path.isfile(fullpath):
+        raise Http404('Файл не найден')
+
+    statobj = os.stat(fullpath)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              statobj.st_mtime, statobj.st_size):
+        return HttpResponseNotModified()
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT + path
+    else:
+        byte_range = parse_range(
+            request.META.get('HTTP_RANGE'), statobj.st_size
+        )
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{statobj.st_size}'
+            return response
+        if byte_range is None:
+            response = FileResponse(
+                open(fullpath, 'rb'), content_type=content_type
+            )
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                iter_file_range(open(fullpath, 'rb'), start, length),
+                status=206,
+                content_type=content_type,
+            )
+            response['Content-Length'] = str(length)
+            response['Content-Range'] = (
+                f'bytes {start}-{end}/{statobj.st_size}'
+            )
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Last-Modified'] = http_date(statobj.st_mtime)
+    response['Cache-Control'] = cache_control_for(path)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,86 @@
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.auth.password_validation import (
+    get_default_password_validators
+)
+from django.template import TemplateSyntaxError
+from django.template.loader import get_template
+from django.urls import NoReverseMatch, reverse
+
+logger = logging.getLogger(__name__)
+
+# URL-имена, которые запрашиваются чаще всего: первый reverse()
+# строит таблицу обратного разрешения для всего URLconf.
+HOT_URL_NAMES = (
+    'posts:index',
+    'posts:follow_index',
+    'posts:post_create',
+    'about:author',
+    'about:tech',
+    'users:login',
+    'users:signup',
+)
+
+
+def iter_template_names(templates_dir):
+    """Возвращает имена всех html-шаблонов каталога относительно него."""
+    for root, _, files in os.walk(templates_dir):
+        for filename in sorted(files):
+            if filename.endswith('.html'):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, templates_dir).replace(os.sep, '/')
+
+
+def warm_up_templates():
+    """Компилирует все шаблоны из TEMPLATES_DIR.
+
+    С кэширующим загрузчиком скомпилированные шаблоны остаются в памяти
+    процесса, и первые запросы после деплоя не тратят время на разбор.
+    """
+    compiled = 0
+    for name in iter_template_names(settings.TEMPLATES_DIR):
+        try:
+            get_template(name)
+        except TemplateSyntaxError:
+            logger.exception('Шаблон %s не скомпилирован', name)
+            continue
+        compiled += 1
+    return compiled
+
+
+def warm_up_urls():
+    """Выполняет reverse() для популярных URL-имён.
+
+    urlconf передаётся явно: в Django 2.2 get_resolver() кэширует
+    резолвер по аргументу, и запросы (они вызывают set_urlconf)
+    пользуются резолвером ROOT_URLCONF, а не резолвером для None.
+    """
+    reversed_count = 0
+    for name in HOT_URL_NAMES:
+        try:
+            reverse(name, urlconf=settings.ROOT_URLCONF)
+        except NoReverseMatch:
+            logger.warning('URL-имя %s не найдено', name)
+            continue
+        reversed_count += 1
+    return reversed_count
+
+
+def warm_up_password_validators():
+    """Создаёт валидаторы паролей заранее.
+
+    CommonPasswordValidator при создании читает и распаковывает список
+    из 20 тысяч паролей. Если прогрев выполняется в мастер-процессе
+    (gunicorn --preload), воркеры получают готовый список после fork.
+    """
+    return len(get_default_password_validators())
+
+
+def warm_up():
+    """Прогрев процесса при старте: шаблоны, URL-резолвер, валидаторы."""
+    templates = warm_up_templates()
+    urls = warm_up_urls()
+    warm_up_password_validators()
+    logger.info('Прогрев: %s шаблонов, %s URL', templates, urls)
@@ -1,9 +1,33 @@
-from xml.etree.ElementTree import Comment
-from django.contrib import admin
-from .models import Group, Post, Comment
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME, ActionForm
+from django.http import Http404, JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
 
+from core.deletion import BackgroundDeleteAdminMixin
+from core.jobs import get_job, start_job
 
-class PostAdmin(admin.ModelAdmin):
+from . import bulk
+from .changelist import COUNT_LIMIT, LargeTableAdminMixin
+from .models import Group, Post, Comment, User
+from .services import schedule_group_deletion
+
+
+def count_label(queryset):
+    """Число объектов для страницы подтверждения, не больше COUNT_LIMIT."""
+    count = queryset.order_by()[:COUNT_LIMIT].count()
+    return f'не меньше {count}' if count == COUNT_LIMIT else str(count)
+
+
+class PostActionForm(ActionForm):
+    # Для действия «Перенести в группу»: slug вместо выпадающего
+    # списка со всеми группами.
+    group = forms.SlugField(required=False, label='Группа (slug)')
+
+
+class PostAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     # Перечисляем поля, которые должны отображаться в админке
     list_display = (
         'pk',
@@ -12,13 +36,186 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
+    # Автор и группа загружаются в том же запросе, что и посты.
+    list_select_related = ('author', 'group')
     # позволит изменять поле group в любом посте без лишних
     # движений мышкой, прямо из списка постов.
     list_editable = ('group',)
+    # Вместо выпадающих списков со всеми группами и пользователями -
+    # поля с поиском, которые подгружают варианты по мере ввода.
+    autocomplete_fields = ('author', 'group')
     # Добавляем интерфейс для поиска по тексту постов
     search_fields = ('text',)
     # Добавляем возможность фильтрации по дате
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', 'is_deleted')
+    empty_value_display = '-пусто-'
+    # Массовые действия выполняются в фоне пачками (posts/bulk.py).
+    action_form = PostActionForm
+    actions = (
+        'move_to_group',
+        'delete_posts',
+        'delete_author_posts',
+        'purge_comments',
+    )
+
+    def get_queryset(self, request):
+        # В админке видны и удалённые авторами посты.
+        queryset = Post.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Стандартное удаление загружает каждый объект и вызывает
+        # сигналы для каждой строки; вместо него - delete_posts.
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_urls(self):
+        urls = [
+            path(
+                'jobs/<str:job_id>/',
+                self.admin_site.admin_view(self.job_status),
+                name='posts_post_job',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def job_status(self, request, job_id):
+        """Прогресс фоновой задачи в JSON."""
+        job = get_job(job_id)
+        if job is None:
+            raise Http404
+        return JsonResponse(job)
+
+    def start_bulk_job(self, request, name, func, *args):
+        job = start_job(name, func, *args)
+        url = reverse('admin:posts_post_job', args=[job.id])
+        self.message_user(request, format_html(
+            'Задача «{}» запущена, <a href="{}">прогресс</a>.', name, url
+        ))
+
+    def move_to_group(self, request, queryset):
+        slug = request.POST.get('group', '')
+        group = Group.objects.filter(slug=slug).first()
+        if group is None:
+            self.message_user(
+                request, f'Группа «{slug}» не найдена.', messages.ERROR
+            )
+            return
+        self.start_bulk_job(
+            request, f'Перенос в группу {group.slug}',
+            bulk.move_posts, queryset, group.pk,
+        )
+    move_to_group.short_description = 'Перенести в группу'
+    move_to_group.allowed_permissions = ('change',)
+
+    def confirm_action(self, request, title, warning, summary):
+        """Страница подтверждения, как у стандартного delete_selected.
+
+        Возвращает None, если действие уже подтверждено.
+        """
+        if request.POST.get('post') == 'yes':
+            return None
+        context = {
+            **self.admin_site.each_context(request),
+            'title': title,
+            'warning': warning,
+            'summary': summary,
+            'opts': self.model._meta,
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+            'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            # Поля формы действия: с select_across отобранные строки
+            # восстанавливаются по фильтрам из адреса страницы.
+            'action_data': [
+                (name, request.POST[name])
+                for name in ('action', 'index', 'select_across', 'group')
+                if name in request.POST
+            ],
+        }
+        return TemplateResponse(
+            request, 'admin/posts/bulk_action_confirmation.html', context
+        )
+
+    def delete_posts(self, request, queryset):
+        response = self.confirm_action(
+            request, 'Удаление постов',
+            'Посты, их комментарии, лайки и картинки будут удалены '
+            'безвозвратно.',
+            [f'Постов: {count_label(queryset)}'],
+        )
+        if response is not None:
+            return response
+        self.start_bulk_job(
+            request, 'Удаление постов', bulk.delete_posts, queryset
+        )
+    delete_posts.short_description = 'Удалить посты'
+    delete_posts.allowed_permissions = ('delete',)
+
+    def delete_author_posts(self, request, queryset):
+        author_ids = list(
+            queryset.order_by().values_list('author_id', flat=True)
+            .distinct()
+        )
+        authors = User.objects.filter(pk__in=author_ids).order_by('username')
+        author_posts = Post.all_objects.filter(author_id__in=author_ids)
+        response = self.confirm_action(
+            request, 'Удаление постов авторов',
+            'Будут безвозвратно удалены все посты этих авторов, а не только '
+            'выбранные, с комментариями, лайками и картинками.',
+            [
+                'Авторы: ' + ', '.join(
+                    authors.values_list('username', flat=True)
+                ),
+                f'Постов: {count_label(author_posts)}',
+            ],
+        )
+        if response is not None:
+            return response
+        self.start_bulk_job(
+            request, 'Удаление постов авторов',
+            bulk.delete_author_posts, author_ids,
+        )
+    delete_author_posts.short_description = 'Удалить все посты их авторов'
+    delete_author_posts.allowed_permissions = ('delete',)
+
+    def purge_comments(self, request, queryset):
+        comments = Comment.objects.filter(post__in=queryset.values('pk'))
+        response = self.confirm_action(
+            request, 'Удаление комментариев',
+            'Комментарии к выбранным постам будут удалены безвозвратно.',
+            [
+                f'Постов: {count_label(queryset)}',
+                f'Комментариев: {count_label(comments)}',
+            ],
+        )
+        if response is not None:
+            return response
+        self.start_bulk_job(
+            request, 'Удаление комментариев', bulk.purge_comments, queryset
+        )
+    purge_comments.short_description = 'Удалить комментарии к постам'
+    purge_comments.allowed_permissions = ('delete',)
+
+
+class GroupAdmin(BackgroundDeleteAdminMixin, admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    # Нужен для autocomplete_fields в PostAdmin.
+    search_fields = ('title', 'slug')
+    empty_value_display = '-пусто-'
+    schedule_deletion = staticmethod(schedule_group_deletion)
+
+
+class CommentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    # Постов миллионы: вместо списка - поле для id.
+    raw_id_fields = ('post',)
+    autocomplete_fields = ('author',)
+    search_fields = ('text',)
+    list_filter = ('created',)
     empty_value_display = '-пусто-'
 
 # При регистрации модели Post источником конфигурации для неё назначаем
@@ -26,5 +223,5 @@ class PostAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
@@ -0,0 +1,237 @@
+# Массовые операции над постами для модерации и фоновое удаление
+# пользователей и групп со всем, что к ним привязано.
+#
+# Работают пачками по pk: каждая пачка - один-два запроса UPDATE или
+# DELETE в своей транзакции, так что блокировка записи SQLite держится
+# недолго. Сигналы post_save/post_delete не вызываются, поэтому
+# статистика групп и сброс кэша прокси выполняются здесь же.
+# Функции принимают первым аргументом core.jobs.Job и запускаются
+# через start_job().
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from sorl.thumbnail import delete as delete_thumbnails
+
+from core.edge import purge
+
+from . import sitemaps, stats
+from .likes import LIKES
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, CommentLike, Follow, Group, Post,
+    PostLike, PostMention, PostTag, User
+)
+from .utils import FEED_SURROGATE_KEY
+
+
+def iter_pk_chunks(queryset, chunk_size=None):
+    """Отдаёт pk объектов queryset пачками по возрастанию, без OFFSET.
+
+    Следующая пачка выбирается условием pk > последний pk, поэтому
+    объекты можно удалять или менять прямо во время обхода.
+    """
+    chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        chunk = queryset
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        pks = list(chunk[:chunk_size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def purge_posts(rows, *group_ids):
+    """Сбрасывает в прокси страницы постов, их авторов и групп."""
+    keys = {FEED_SURROGATE_KEY}
+    keys.update(f'group-{pk}' for pk in group_ids if pk)
+    for pk, group_id, author_id in rows:
+        keys.update((f'post-{pk}', f'author-{author_id}'))
+        if group_id:
+            keys.add(f'group-{group_id}')
+    purge(*sorted(keys))
+    stats.invalidate_latest(*keys)
+
+
+def refresh_groups(group_ids):
+    for group_id in group_ids:
+        if group_id is not None:
+            stats.refresh_group(group_id)
+
+
+def raw_delete_in_chunks(job, queryset, purge_keys=None):
+    """Удаляет объекты queryset пачками, без загрузки и без сигналов.
+
+    purge_keys(queryset пачки) возвращает ключи прокси, которые нужно
+    сбросить после удаления пачки.
+    """
+    model = queryset.model
+    for pks in iter_pk_chunks(queryset):
+        with transaction.atomic():
+            chunk = model._base_manager.filter(pk__in=pks)
+            keys = purge_keys(chunk) if purge_keys else ()
+            chunk._raw_delete(chunk.db)
+        purge(*keys)
+        job.advance(len(pks))
+
+
+def update_in_chunks(job, queryset, **values):
+    """Выполняет queryset.update(**values) пачками."""
+    model = queryset.model
+    for pks in iter_pk_chunks(queryset):
+        with transaction.atomic():
+            model._base_manager.filter(pk__in=pks).update(**values)
+        job.advance(len(pks))
+
+
+def move_posts(job, queryset, group_id):
+    """Переносит посты queryset в группу group_id."""
+    job.total = queryset.count()
+    touched_groups = {group_id}
+    for pks in iter_pk_chunks(queryset):
+        with transaction.atomic():
+            posts = Post.all_objects.filter(pk__in=pks)
+            rows = list(posts.values_list('pk', 'group_id', 'author_id'))
+            posts.update(group_id=group_id, version=F('version') + 1)
+        touched_groups.update(row[1] for row in rows)
+        purge_posts(rows, group_id)
+        job.advance(len(pks))
+    refresh_groups(touched_groups)
+
+
+def delete_posts(job, queryset):
+    """Удаляет посты queryset вместе с комментариями и картинками."""
+    job.total = queryset.count()
+    delete_post_chunks(job, queryset)
+
+
+def delete_post_chunks(job, queryset):
+    touched_groups = set()
+    for pks in iter_pk_chunks(queryset):
+        with transaction.atomic():
+            posts = Post.all_objects.filter(pk__in=pks)
+            rows = list(
+                posts.values_list('pk', 'group_id', 'author_id', 'image')
+            )
+            # _raw_delete выполняет один DELETE без загрузки объектов
+            # и без сигналов; зависимые строки удаляем сами, первыми.
+            comments = Comment.objects.filter(post_id__in=pks)
+            comment_likes = CommentLike.objects.filter(
+                comment__in=comments.values('pk')
+            )
+            comment_likes._raw_delete(comment_likes.db)
+            for model in (Comment, PostLike, PostTag, PostMention):
+                related = model.objects.filter(post_id__in=pks)
+                related._raw_delete(related.db)
+            posts._raw_delete(posts.db)
+        for image in (row[3] for row in rows if row[3]):
+            delete_thumbnails(image, delete_file=False)
+            default_storage.delete(image)
+        touched_groups.update(row[1] for row in rows)
+        purge_posts([row[:3] for row in rows])
+        sitemaps.invalidate_segment('posts', *pks)
+        job.advance(len(pks))
+    refresh_groups(touched_groups)
+
+
+def delete_author_posts(job, author_ids):
+    """Удаляет все посты авторов author_ids."""
+    delete_posts(job, Post.all_objects.filter(author_id__in=author_ids))
+
+
+def delete_likes(job, queryset, kind):
+    """Удаляет лайки пачками и вычитает их из счётчиков объектов.
+
+    Вычитание идёт через буфер счётчика: иначе оно могло бы попасть
+    в базу раньше ещё не перенесённого туда самого лайка.
+    """
+    model, field, counter = LIKES[kind]
+    for pks in iter_pk_chunks(queryset):
+        with transaction.atomic():
+            chunk = model.objects.filter(pk__in=pks)
+            counts = Counter(chunk.values_list(field, flat=True))
+            chunk._raw_delete(chunk.db)
+        for pk, count in counts.items():
+            counter.add(pk, -count)
+        job.advance(len(pks))
+
+
+def comment_purge_keys(comments):
+    post_ids = set(comments.values_list('post_id', flat=True))
+    return [f'post-{pk}' for pk in sorted(post_ids)]
+
+
+def follow_purge_keys(follows):
+    author_ids = set(follows.values_list('author_id', flat=True))
+    return [f'author-{pk}' for pk in sorted(author_ids)]
+
+
+def purge_comments(job, queryset):
+    """Удаляет все комментарии к постам queryset."""
+    comments = Comment.objects.filter(post__in=queryset.values('pk'))
+    likes = CommentLike.objects.filter(comment__in=comments.values('pk'))
+    job.total = comments.count() + likes.count()
+    raw_delete_in_chunks(job, likes)
+    raw_delete_in_chunks(job, comments, comment_purge_keys)
+
+
+def delete_user(job, user_id):
+    """Удаляет пользователя и всё, что с ним связано, пачками.
+
+    Пользователь к этому моменту уже заблокирован и скрыт с сайта
+    (UserDeletion), отметка удаляется вместе с ним.
+    Строку пользователя удаляем последней: связанных строк у неё
+    не остаётся, и обычный delete() ничего лишнего не загружает.
+    """
+    follows = (
+        Follow.objects.filter(user_id=user_id)
+        | Follow.objects.filter(author_id=user_id)
+    )
+    comments = Comment.objects.filter(author_id=user_id)
+    # Лайки к комментариям пользователя удаляются вместе с ними,
+    # его собственные лайки - с вычитанием из счётчиков.
+    comment_likes = CommentLike.objects.filter(
+        comment__in=comments.values('pk')
+    ) | CommentLike.objects.filter(user_id=user_id)
+    post_likes = PostLike.objects.filter(user_id=user_id)
+    mentions = PostMention.objects.filter(user_id=user_id)
+    posts = Post.all_objects.filter(author_id=user_id)
+    archived_comments = (
+        ArchivedComment.objects.filter(author_id=user_id)
+        | ArchivedComment.objects.filter(post__author_id=user_id)
+    )
+    archived_posts = ArchivedPost.objects.filter(author_id=user_id)
+    job.total = sum(queryset.count() for queryset in (
+        follows, comment_likes, post_likes, comments, mentions,
+        archived_comments, archived_posts, posts,
+    ))
+    raw_delete_in_chunks(job, follows, follow_purge_keys)
+    delete_likes(job, comment_likes, 'comment')
+    delete_likes(job, post_likes, 'post')
+    raw_delete_in_chunks(job, comments, comment_purge_keys)
+    raw_delete_in_chunks(job, mentions)
+    raw_delete_in_chunks(job, archived_comments)
+    raw_delete_in_chunks(job, archived_posts)
+    delete_post_chunks(job, posts)
+    User.objects.filter(pk=user_id).delete()
+
+
+def delete_group(job, group_id):
+    """Отвязывает от группы посты пачками и удаляет её."""
+    posts = Post.all_objects.filter(group_id=group_id)
+    archived_posts = ArchivedPost.objects.filter(group_id=group_id)
+    job.total = posts.count() + archived_posts.count()
+    for pks in iter_pk_chunks(posts):
+        with transaction.atomic():
+            chunk = Post.all_objects.filter(pk__in=pks)
+            rows = list(chunk.values_list('pk', 'group_id', 'author_id'))
+            chunk.update(group_id=None, version=F('version') + 1)
+        purge_posts(rows)
+        job.advance(len(pks))
+    update_in_chunks(job, archived_posts, group_id=None)
+    Group.all_objects.filter(pk=group_id).delete()
@@ -0,0 +1,163 @@
+# Списки объектов в админке для больших таблиц.
+#
+# Стандартный changelist на каждой странице считает COUNT(*) по всей
+# таблице (полный проход в SQLite) и листает через OFFSET, который
+# тем медленнее, чем дальше страница.
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+# Параметр запроса с pk последнего объекта предыдущей страницы.
+CURSOR_VAR = 'after'
+# Больше этого числа строк отфильтрованный список не считает.
+COUNT_LIMIT = 10000
+KEYSET_ORDERING = ('-pk',)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator с приблизительным числом объектов.
+
+    Без фильтров число объектов оценивается по максимальному pk:
+    это один шаг по индексу. С фильтрами считается не больше
+    COUNT_LIMIT строк.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return queryset.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        return queryset[:COUNT_LIMIT].count()
+
+
+class KeysetChangeList(ChangeList):
+    """Changelist, который листает по ключу: WHERE pk < after.
+
+    Работает при сортировке по умолчанию (KEYSET_ORDERING). Если
+    пользователь выбрал сортировку по столбцу, используется обычная
+    постраничная навигация.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        try:
+            self.cursor = int(request.GET[CURSOR_VAR])
+        except (KeyError, ValueError):
+            self.cursor = None
+        self.next_cursor = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    @cached_property
+    def keyset(self):
+        return (
+            ORDER_VAR not in self.params and not self.show_all
+            and tuple(self.model_admin.ordering or ()) == KEYSET_ORDERING
+        )
+
+    def get_results(self, request):
+        if self.cursor is None or not self.keyset:
+            super().get_results(request)
+        else:
+            self.paginator = self.model_admin.get_paginator(
+                request, self.queryset, self.list_per_page
+            )
+            self.result_count = self.paginator.count
+            self.show_full_result_count = (
+                self.model_admin.show_full_result_count
+            )
+            self.full_result_count = (
+                self.root_queryset.count()
+                if self.show_full_result_count else None
+            )
+            self.show_admin_actions = True
+            self.result_list = self.queryset.filter(
+                pk__lt=self.cursor
+            )[:self.list_per_page]
+            self.can_show_all = False
+            self.multi_page = True
+        if self.keyset:
+            rows = list(self.result_list)
+            if len(rows) == self.list_per_page:
+                self.next_cursor = rows[-1].pk
+
+    @property
+    def first_page_url(self):
+        return self.get_query_string(remove=[CURSOR_VAR, PAGE_VAR])
+
+    @property
+    def next_page_url(self):
+        return self.get_query_string(
+            {CURSOR_VAR: self.next_cursor}, [PAGE_VAR]
+        )
+
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """AutocompleteSelect, который берёт выбранный объект из preloaded.
+
+    В changelist с list_editable виджет выводится в каждой строке
+    и делает по запросу на строку, хотя связанный объект уже загружен
+    через list_select_related.
+    """
+
+    preloaded = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = [
+            str(v) for v in value
+            if str(v) not in self.choices.field.empty_values
+        ]
+        obj = self.preloaded
+        if obj is None or selected != [str(obj.pk)]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        label = self.choices.field.label_from_instance(obj)
+        options.append(
+            self.create_option(name, obj.pk, label, True, len(options))
+        )
+        return [(None, options, 0)]
+
+
+class PreloadedFormSetMixin:
+    """Передаёт виджетам строки уже загруженные связанные объекты."""
+
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        for name, field in form.fields.items():
+            # Виджет обёрнут в RelatedFieldWidgetWrapper.
+            widget = getattr(field.widget, 'widget', field.widget)
+            if isinstance(widget, PreloadedAutocompleteSelect):
+                widget.preloaded = getattr(form.instance, name, None)
+        return form
+
+
+class LargeTableAdminMixin:
+    """Настройки ModelAdmin для таблиц с миллионами строк."""
+
+    ordering = KEYSET_ORDERING
+    paginator = EstimatedCountPaginator
+    # Не считать все объекты таблицы рядом с отфильтрованными.
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_changelist_formset(self, request, **kwargs):
+        formset = super().get_changelist_formset(request, **kwargs)
+        return type(formset.__name__, (PreloadedFormSetMixin, formset), {})
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if (db_field.name in self.get_autocomplete_fields(request)
+                and 'widget' not in kwargs):
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
@@ -0,0 +1,180 @@
+# RSS и Atom: вся лента, группа и автор.
+#
+# Читатели опрашивают ленты часто, поэтому ответы условные: ETag
+# и Last-Modified берутся из закэшированного времени последнего поста
+# (stats.latest_pub_date), и на If-None-Match / If-Modified-Since
+# ответ 304 отдаётся без запросов к базе.
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from core.edge import edge_cache, set_surrogate_keys
+
+from . import stats
+from .models import Group, Post, User
+from .utils import FEED_SURROGATE_KEY
+
+FEED_ITEMS = 20
+# slug группы или имя автора -> pk: по pk строятся ключи лент.
+PK_CACHE_KEY = 'posts:feed_pk:{}:{}'
+PK_TIMEOUT = 60 * 60
+
+
+def cached_pk(model, field, value):
+    cache_key = PK_CACHE_KEY.format(model._meta.model_name, value)
+    cached = cache.get(cache_key)
+    if cached is None:
+        pk = model.objects.filter(**{field: value}).values_list(
+            'pk', flat=True
+        ).first()
+        cached = (pk,)
+        cache.set(cache_key, cached, PK_TIMEOUT)
+    return cached[0]
+
+
+def feed_scope(slug=None, username=None):
+    """Ключ ленты и queryset её постов по аргументам URL."""
+    if slug is not None:
+        group_id = cached_pk(Group, 'slug', slug)
+        if group_id is None:
+            return None, None
+        return f'group-{group_id}', Post.objects.filter(group_id=group_id)
+    if username is not None:
+        author_id = cached_pk(User, 'username', username)
+        if author_id is None:
+            return None, None
+        return f'author-{author_id}', Post.objects.filter(author_id=author_id)
+    return FEED_SURROGATE_KEY, Post.objects.all()
+
+
+def feed_last_modified(request, **kwargs):
+    key, queryset = feed_scope(**kwargs)
+    if key is None:
+        return None
+    return stats.latest_pub_date(key, queryset)
+
+
+def feed_etag(request, **kwargs):
+    key, queryset = feed_scope(**kwargs)
+    if key is None:
+        return None
+    latest = stats.latest_pub_date(key, queryset)
+    stamp = latest.timestamp() if latest else 0
+    # Разный формат - разный ETag.
+    return f'{key}-{request.resolver_match.url_name}-{stamp}'
+
+
+class PostsFeed(Feed):
+    """Общая часть лент: посты с авторами и группами одним запросом."""
+
+    def __call__(self, request, *args, **kwargs):
+        response = super().__call__(request, *args, **kwargs)
+        key, _ = feed_scope(**kwargs)
+        return set_surrogate_keys(response, key)
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.get_posts(obj).select_related(
+            'author', 'group'
+        ).order_by('-pub_date')[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(50)
+
+    def item_description(self, item):
+        return item.text_html
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+
+class LatestPostsFeed(PostsFeed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupPostsFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=[obj.slug])
+
+
+class AuthorPostsFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.username}'
+
+    def description(self, obj):
+        return f'Новые записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return obj.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def conditional_feed(feed):
+    return edge_cache(
+        condition(etag_func=feed_etag, last_modified_func=feed_last_modified)(
+            feed
+        )
+    )
+
+
+latest_rss = conditional_feed(LatestPostsFeed())
+latest_atom = conditional_feed(LatestPostsAtomFeed())
+group_rss = conditional_feed(GroupPostsFeed())
+group_atom = conditional_feed(GroupPostsAtomFeed())
+author_rss = conditional_feed(AuthorPostsFeed())
+author_atom = conditional_feed(AuthorPostsAtomFeed())
@@ -0,0 +1,36 @@
+# Превращение текста постов и комментариев в HTML.
+#
+# HTML собирается один раз при сохранении и хранится в поле text_html,
+# шаблоны выводят его как есть. После изменения render_text() готовый
+# HTML пересобирается командой rerender_text. Здесь же разбираются
+# хэштеги и упоминания (см. posts/tags.py).
+import re
+
+from django.utils.html import linebreaks, urlize
+
+TAG_MAX_LENGTH = 100
+# Не внутри слова, HTML-сущности или адреса (http://site/#anchor).
+HASHTAG_RE = re.compile(r'(?<![\w&#/])#(\w+)')
+# Не внутри слова и не часть e-mail.
+MENTION_RE = re.compile(r'(?<![\w@.])@([\w.+-]+)')
+
+
+def render_text(text):
+    """Экранирует текст, делает ссылки кликабельными и расставляет <p>."""
+    # urlize экранирует всё, кроме создаваемых им ссылок, поэтому
+    # linebreaks экранировать повторно не нужно.
+    return linebreaks(urlize(text, nofollow=True, autoescape=True))
+
+
+def extract_tags(text):
+    """Хэштеги текста в нижнем регистре, без «#»."""
+    return {
+        tag.lower() for tag in HASHTAG_RE.findall(text)
+        if len(tag) <= TAG_MAX_LENGTH
+    }
+
+
+def extract_mentions(text):
+    """Имена пользователей, упомянутых в тексте через «@»."""
+    # Точка в конце - скорее конец предложения, чем часть имени.
+    return {name.rstrip('.') for name in MENTION_RE.findall(text)} - {''}
@@ -0,0 +1,118 @@
+# Лайки постов и комментариев.
+#
+# Каждый лайк - строка PostLike или CommentLike с уникальной парой
+# (объект, пользователь). Поле likes_count при лайке не обновляется:
+# приращение копится в кэше и переносится в базу пачкой
+# (core/counters.py), а при выводе к полю прибавляется то, что ещё
+# лежит в буфере. При сбросе буфера счётчик пересчитывается по строкам
+# лайков, так что потерянное приращение не копит расхождение.
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+
+from core.counters import BufferedCounter
+
+from .models import Comment, CommentLike, Post, PostLike
+from .utils import post_surrogate_keys
+
+
+def count_likes(model, field):
+    """recount для BufferedCounter: число лайков объектов pks."""
+    def recount(pks):
+        return dict(
+            model.objects.filter(**{f'{field}__in': pks}).order_by()
+            .values(field).annotate(count=Count('pk'))
+            .values_list(field, 'count')
+        )
+    return recount
+
+
+post_likes = BufferedCounter(
+    'post_likes', Post, 'likes_count',
+    recount=count_likes(PostLike, 'post_id'),
+)
+comment_likes = BufferedCounter(
+    'comment_likes', Comment, 'likes_count',
+    recount=count_likes(CommentLike, 'comment_id'),
+)
+
+# Вид объекта -> модель лайка, её поле с объектом и счётчик.
+LIKES = {
+    'post': (PostLike, 'post_id', post_likes),
+    'comment': (CommentLike, 'comment_id', comment_likes),
+}
+
+
+def toggle_like(kind, pk, user):
+    """Ставит лайк пользователя или снимает поставленный.
+
+    Возвращает True, если лайк теперь стоит.
+    """
+    model, field, counter = LIKES[kind]
+    deleted, _ = model.objects.filter(**{field: pk, 'user': user}).delete()
+    if deleted:
+        counter.add(pk, -1)
+        return False
+    try:
+        with transaction.atomic():
+            model.objects.create(**{field: pk, 'user': user})
+    except IntegrityError:
+        # Параллельный запрос того же пользователя уже поставил лайк.
+        return True
+    counter.add(pk, 1)
+    return True
+
+
+def like_purge_keys(obj):
+    """Ключи прокси-кэша страниц, на которых виден счётчик лайков obj."""
+    if isinstance(obj, Post):
+        return post_surrogate_keys(obj)
+    return [f'post-{obj.post_id}']
+
+
+def attach_likes(kind, objs, user):
+    """Добавляет к счётчикам objs буфер и отмечает лайки пользователя."""
+    model, field, counter = LIKES[kind]
+    counter.attach(objs)
+    liked = set()
+    if user.is_authenticated and objs:
+        liked = set(model.objects.filter(
+            user=user, **{f'{field}__in': [obj.pk for obj in objs]}
+        ).values_list(field, flat=True))
+    for obj in objs:
+        obj.liked = obj.pk in liked
+    return objs
+
+
+class LikedObjects:
+    """Объекты страницы, к которым лайки добавляются при первом обходе.
+
+    Выборка откладывается до шаблона, как и у обычного queryset
+    страницы, поэтому потоковый вывод (core/streaming.py) не страдает.
+    """
+
+    def __init__(self, kind, objs, user):
+        self.kind = kind
+        self.objs = objs
+        self.user = user
+        self.loaded = None
+
+    def load(self):
+        if self.loaded is None:
+            self.loaded = attach_likes(self.kind, list(self.objs), self.user)
+        return self.loaded
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+    def __getitem__(self, index):
+        return self.load()[index]
+
+
+def with_likes(page_obj, user):
+    page_obj.object_list = LikedObjects(
+        'post', page_obj.object_list, user
+    )
+    return page_obj
@@ -0,0 +1,103 @@
+# Уведомления о новых постах.
+#
+# Для каждой ленты (вся лента, группа, автор) в кэше лежит id её
+# последнего поста: при публикации post_published() записывает его
+# сразу, без сброса и пересчёта. Страница ленты раз в LIVE_POLL_SECONDS
+# спрашивает, что нового после её верхнего поста. Ответ - один
+# get_many в кэше, и только если появилось что-то новое, новые посты
+# считаются одним запросом с условием pk > since.
+#
+# Это короткий опрос, а не SSE или long-poll: Django 2.2 работает
+# только через WSGI, и открытое соединение держало бы поток воркера.
+from django.core.cache import cache
+from django.db.models import Max
+
+from .models import Follow, Post
+from .utils import FEED_SURROGATE_KEY
+
+LATEST_ID_KEY = 'posts:latest_id:{}'
+LATEST_ID_TIMEOUT = 24 * 60 * 60
+
+
+def post_published(post):
+    """Запоминает пост как последний в его лентах."""
+    keys = [FEED_SURROGATE_KEY, f'author-{post.author_id}']
+    if post.group_id:
+        keys.append(f'group-{post.group_id}')
+    cache.set_many(
+        {LATEST_ID_KEY.format(key): post.pk for key in keys},
+        LATEST_ID_TIMEOUT,
+    )
+
+
+class Scope:
+    """Лента: ключи её последних id и queryset её постов."""
+
+    def __init__(self, keys, queryset, compute):
+        self.keys = keys
+        self.queryset = queryset
+        # compute(ключи без значения в кэше) -> {ключ: последний id}
+        self.compute = compute
+
+    def latest_id(self):
+        cache_keys = {LATEST_ID_KEY.format(key): key for key in self.keys}
+        found = cache.get_many(cache_keys)
+        values = list(found.values())
+        missing = [key for cache_key, key in cache_keys.items()
+                   if cache_key not in found]
+        if missing:
+            computed = self.compute(missing)
+            for key in missing:
+                value = computed.get(key) or 0
+                # add, а не set: не затираем id поста, опубликованного,
+                # пока мы считали.
+                cache.add(LATEST_ID_KEY.format(key), value, LATEST_ID_TIMEOUT)
+                values.append(value)
+        return max(values, default=0)
+
+    def count_new(self, since):
+        return self.queryset.filter(pk__gt=since).count()
+
+
+def max_pk(key, queryset):
+    return {key: queryset.aggregate(max_pk=Max('pk'))['max_pk']}
+
+
+def site_scope():
+    posts = Post.objects.all()
+    return Scope(
+        [FEED_SURROGATE_KEY], posts,
+        lambda missing: max_pk(FEED_SURROGATE_KEY, posts),
+    )
+
+
+def group_scope(group_id):
+    key = f'group-{group_id}'
+    posts = Post.objects.filter(group_id=group_id)
+    return Scope([key], posts, lambda missing: max_pk(key, posts))
+
+
+def follow_scope(user):
+    author_ids = list(
+        Follow.objects.filter(user=user).values_list('author_id', flat=True)
+    )
+
+    def compute(missing):
+        ids = [int(key.split('-')[1]) for key in missing]
+        rows = Post.objects.filter(author_id__in=ids).order_by().values(
+            'author_id'
+        ).annotate(max_pk=Max('pk')).values_list('author_id', 'max_pk')
+        return {f'author-{author_id}': pk for author_id, pk in rows}
+
+    return Scope(
+        [f'author-{author_id}' for author_id in author_ids],
+        Post.objects.filter(author_id__in=author_ids),
+        compute,
+    )
+
+
+def new_posts(scope, since):
+    """Сколько постов ленты новее since и id последнего из них."""
+    latest = scope.latest_id()
+    count = scope.count_new(since) if latest > since else 0
+    return {'count': count, 'latest': latest}
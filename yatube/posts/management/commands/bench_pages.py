@@ -0,0 +1,158 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+from statistics import median
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.warmup import warm_up
+from posts.models import Group, Post
+
+# Режимы отдачи: (STREAMING_RENDER, HTML_MINIFY).
+MODES = {
+    'render': (False, False),
+    'render+minify': (False, True),
+    'stream': (True, False),
+    'stream+minify': (True, True),
+}
+# Режимы первого запроса: дополнительные аргументы процесса замера.
+FIRST_REQUEST_MODES = {
+    'без прогрева': [],
+    'с прогревом': ['--warm'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время до первого байта, полное время и размер лент '
+        '(главная, группа, профиль) в режимах обычного и потокового '
+        'рендеринга с сжатием HTML и без него. С --first-request - '
+        'время первого запроса нового процесса с прогревом и без него.'
+    )
+    # Проверки импортируют URLconf и представления, и первый запрос
+    # процесса замера был бы уже не холодным, как у воркера после wsgi.py.
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=10)
+        parser.add_argument(
+            '--first-request',
+            action='store_true',
+            help='Сравнить первый запрос нового процесса с прогревом '
+                 '(core.warmup) и без него.',
+        )
+        # Служебные: один замер в отдельном процессе.
+        parser.add_argument('--probe', help=argparse.SUPPRESS)
+        parser.add_argument(
+            '--warm', action='store_true', help=argparse.SUPPRESS
+        )
+
+    def get_client(self):
+        host = next(
+            (host.lstrip('.') for host in settings.ALLOWED_HOSTS
+             if host != '*'),
+            'localhost',
+        )
+        return Client(HTTP_HOST=host)
+
+    def feed_urls(self):
+        urls = [reverse('posts:index')]
+        group = Group.objects.order_by('pk').first()
+        if group is not None:
+            urls.append(reverse('posts:group_list', args=[group.slug]))
+        post = Post.objects.select_related('author').order_by('pk').first()
+        if post is not None:
+            urls.append(
+                reverse('posts:profile', args=[post.author.username])
+            )
+        return urls
+
+    def fetch(self, client, url):
+        """Возвращает время до первого байта, полное время и размер."""
+        started = time.perf_counter()
+        response = client.get(url)
+        if response.streaming:
+            chunks = iter(response.streaming_content)
+            body = next(chunks, b'')
+            first_byte = time.perf_counter() - started
+            body += b''.join(chunks)
+        else:
+            body = response.content
+            first_byte = time.perf_counter() - started
+        return first_byte, time.perf_counter() - started, len(body)
+
+    def probe(self, url, warm):
+        """Первый запрос процесса, как у воркера после wsgi.py."""
+        client = self.get_client()
+        # WSGIHandler загружает middleware при создании, до прогрева.
+        client.handler.load_middleware()
+        if warm:
+            warm_up()
+        first_byte, total, _ = self.fetch(client, url)
+        # Повторный запрос - для сравнения с прогретым процессом.
+        _, again, _ = self.fetch(client, f'{url}-again')
+        self.stdout.write(f'{first_byte} {total} {again}')
+
+    def bench_first_request(self, rounds):
+        # Каждый замер - в новом процессе: в этом шаблоны и URL-резолвер
+        # уже прогреты. Загрузка Django в замер не входит. Режимы
+        # чередуются, а выводится медиана: запуск процесса шумный.
+        manage_py = os.path.join(settings.BASE_DIR, 'manage.py')
+        for url in self.feed_urls():
+            self.stdout.write(url)
+            results = {mode: [] for mode in FIRST_REQUEST_MODES}
+            for i in range(rounds):
+                for mode, extra in FIRST_REQUEST_MODES.items():
+                    output = subprocess.run(
+                        [sys.executable, manage_py, 'bench_pages',
+                         '--probe', f'{url}?bench=first{i}', *extra],
+                        check=True, stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE, universal_newlines=True,
+                    ).stdout
+                    results[mode].append(tuple(map(float, output.split())))
+            for mode, timings in results.items():
+                first_byte, total, again = (
+                    median(column) * 1000 for column in zip(*timings)
+                )
+                self.stdout.write(
+                    f'  {mode:<14} TTFB {first_byte:7.2f} мс, '
+                    f'всего {total:7.2f} мс, повторный {again:7.2f} мс'
+                )
+
+    def handle(self, *args, **options):
+        rounds = options['rounds']
+        if options['probe']:
+            self.probe(options['probe'], options['warm'])
+            return
+        if options['first_request']:
+            self.bench_first_request(rounds)
+            return
+        client = self.get_client()
+        for url in self.feed_urls():
+            self.stdout.write(url)
+            raw_size = None
+            for mode, (streaming, minify) in MODES.items():
+                with override_settings(
+                    STREAMING_RENDER=streaming, HTML_MINIFY=minify
+                ):
+                    # Разные параметры запроса, чтобы не попадать
+                    # в кэш cache_page главной страницы.
+                    results = [
+                        self.fetch(client, f'{url}?bench={mode}{i}')
+                        for i in range(rounds)
+                    ]
+                first_byte = sum(r[0] for r in results) / rounds * 1000
+                total = sum(r[1] for r in results) / rounds * 1000
+                size = results[-1][2]
+                if raw_size is None:
+                    raw_size = size
+                self.stdout.write(
+                    f'  {mode:<14} TTFB {first_byte:7.2f} мс, '
+                    f'всего {total:7.2f} мс, {size} байт '
+                    f'(сэкономлено {raw_size - size})'
+                )
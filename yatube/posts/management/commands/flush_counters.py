@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.likes import comment_likes, post_likes
+from posts.visits import post_views, profile_visits
+
+COUNTERS = (post_likes, comment_likes, post_views, profile_visits)
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит в базу накопленные в кэше счётчики. Запросы делают это '
+        'сами раз в COUNTER_FLUSH_INTERVAL секунд, команда нужна для cron '
+        'и перед остановкой сервера.'
+    )
+
+    def handle(self, *args, **options):
+        for counter in COUNTERS:
+            # Второй вызов переносит поколение, закрытое первым.
+            updated = counter.flush() + counter.flush()
+            self.stdout.write(f'{counter.name}: обновлено {updated}')
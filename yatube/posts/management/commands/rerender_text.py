@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+from posts.services import rerender_text
+
+MODELS = {
+    'post': Post,
+    'comment': Comment,
+    'archivedpost': ArchivedPost,
+    'archivedcomment': ArchivedComment,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает готовый HTML текста постов и комментариев '
+        'после изменения posts/formatting.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models',
+            nargs='*',
+            help=(
+                'Какие модели обработать: ' + ', '.join(MODELS)
+                + '. По умолчанию - все.'
+            ),
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько объектов обновлять в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        names = options['models'] or list(MODELS)
+        unknown = set(names) - set(MODELS)
+        if unknown:
+            raise CommandError(
+                'Неизвестные модели: ' + ', '.join(sorted(unknown))
+            )
+        for name in names:
+            updated = rerender_text(MODELS[name], options['batch_size'])
+            self.stdout.write(f'{name}: обновлено {updated}')
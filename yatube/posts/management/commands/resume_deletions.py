@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.jobs import Job
+from posts import bulk
+from posts.models import Group, UserDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        'Доделывает фоновые удаления пользователей и групп, прерванные '
+        'перезапуском процесса. Задачи выполняются в самой команде, '
+        'запускать её стоит после остановки старых воркеров.'
+    )
+
+    def handle(self, *args, **options):
+        deletions = UserDeletion.objects.select_related('user')
+        for deletion in deletions.order_by('created'):
+            self.run_job(
+                f'Удаление пользователя {deletion.user.username}',
+                bulk.delete_user, deletion.user_id,
+            )
+        for group in Group.all_objects.filter(is_deleted=True):
+            self.run_job(
+                f'Удаление группы {group.slug}', bulk.delete_group, group.pk
+            )
+
+    def run_job(self, name, func, pk):
+        job = Job(name)
+        job.run(func, pk)
+        self.stdout.write(f'{name}: {job.status}, обработано {job.done}')
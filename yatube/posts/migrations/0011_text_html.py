@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:29
+
+from django.db import migrations, models
+
+from posts.formatting import render_text
+
+
+def fill_text_html(apps, schema_editor):
+    for name in ('Post', 'Comment', 'ArchivedPost', 'ArchivedComment'):
+        model = apps.get_model('posts', name)
+        rows = model.objects.order_by('pk').values_list('pk', 'text')
+        last_pk = 0
+        while True:
+            chunk = list(rows.filter(pk__gt=last_pk)[:500])
+            if not chunk:
+                break
+            model.objects.bulk_update([
+                model(pk=pk, text_html=render_text(text))
+                for pk, text in chunk
+            ], ['text_html'])
+            last_pk = chunk[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_group_is_deleted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='text_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='text_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(fill_text_html, migrations.RunPython.noop),
+    ]
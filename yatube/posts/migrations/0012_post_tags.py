@@ -0,0 +1,92 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from posts.formatting import extract_mentions, extract_tags
+
+
+def fill_post_tags(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostTag = apps.get_model('posts', 'PostTag')
+    PostMention = apps.get_model('posts', 'PostMention')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    rows = Post.objects.order_by('pk').values_list(
+        'pk', 'author_id', 'pub_date', 'text'
+    )
+    last_pk = 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last_pk)[:500])
+        if not chunk:
+            break
+        mentions = {row[0]: extract_mentions(row[3]) for row in chunk}
+        user_ids = dict(User.objects.filter(
+            username__in=set().union(*mentions.values())
+        ).values_list('username', 'pk'))
+        PostTag.objects.bulk_create(
+            PostTag(post_id=pk, tag=tag, pub_date=pub_date)
+            for pk, author_id, pub_date, text in chunk
+            for tag in extract_tags(text)
+        )
+        PostMention.objects.bulk_create(
+            PostMention(post_id=pk, user_id=user_ids[name], pub_date=pub_date)
+            for pk, author_id, pub_date, text in chunk
+            for name in mentions[pk]
+            if name in user_ids and user_ids[name] != author_id
+        )
+        last_pk = chunk[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=100, verbose_name='Тег')),
+                ('pub_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to='posts.Post')),
+            ],
+            options={
+                'verbose_name': 'Тег поста',
+                'verbose_name_plural': 'Теги постов',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostMention',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Упоминание',
+                'verbose_name_plural': 'Упоминания',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(fields=['tag', '-pub_date'], name='posttag_tag_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='posttag',
+            constraint=models.UniqueConstraint(fields=('post', 'tag'), name='unique_post_tag'),
+        ),
+        migrations.AddIndex(
+            model_name='postmention',
+            index=models.Index(fields=['user', '-pub_date'], name='mention_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='postmention',
+            constraint=models.UniqueConstraint(fields=('post', 'user'), name='unique_post_mention'),
+        ),
+        migrations.RunPython(fill_post_tags, migrations.RunPython.noop),
+    ]
@@ -3,13 +3,42 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .formatting import TAG_MAX_LENGTH, render_text
+
 User = get_user_model()
 
 
+def exclude_counters(instance, kwargs,
+                     counters=('likes_count', 'views_count')):
+    """Не даёт save() затереть счётчики, которые меняются в обход него.
+
+    Полное сохранение загруженного объекта пишет все поля, и приращение
+    счётчика, перенесённое в базу после загрузки объекта, пропало бы.
+    """
+    if not instance._state.adding and kwargs.get('update_fields') is None:
+        kwargs['update_fields'] = [
+            field.name for field in instance._meta.concrete_fields
+            if not field.primary_key and field.name not in counters
+        ]
+
+
+class GroupManager(models.Manager):
+    """Менеджер по умолчанию: только не удалённые группы."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    # Группа, удаление которой идёт в фоне (posts/bulk.py): скрыта
+    # с сайта, пока у её постов обнуляется ссылка на группу.
+    is_deleted = models.BooleanField('Удалена', default=False, editable=False)
+
+    objects = GroupManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = 'Группа'
@@ -19,11 +48,99 @@ class Group(models.Model):
         return self.title
 
 
+class GroupStats(models.Model):
+    """Агрегированная статистика группы для каталога групп.
+
+    Обновляется инкрементально при создании, удалении и переносе постов
+    (см. posts/stats.py), чтобы каталог не считал посты каждой группы.
+    """
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+    last_pub_date = models.DateTimeField(
+        'Дата последнего поста',
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+    def __str__(self):
+        return f'{self.group}: {self.posts_count}'
+
+
+class ProfileStats(models.Model):
+    """Счётчик посещений профиля.
+
+    Строка создаётся при первом переносе посещений из буфера
+    (posts/visits.py), у пользователей без посещений её нет.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='profile_stats',
+    )
+    visits_count = models.PositiveIntegerField(
+        'Посещения профиля', default=0
+    )
+
+    class Meta:
+        verbose_name = 'Статистика профиля'
+        verbose_name_plural = 'Статистика профилей'
+
+    def __str__(self):
+        return f'{self.user}: {self.visits_count}'
+
+
+class UserDeletion(models.Model):
+    """Отметка о пользователе, удаление которого идёт в фоне (posts/bulk.py).
+
+    Пока отметка есть, профиль и посты пользователя скрыты с сайта.
+    Прерванное удаление перезапускает команда resume_deletions.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='deletion',
+    )
+    created = models.DateTimeField('Запланировано', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Удаление пользователя'
+        verbose_name_plural = 'Удаления пользователей'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class PostManager(models.Manager):
+    """Менеджер по умолчанию: только не удалённые посты.
+
+    Посты пользователей, которые удаляются в фоне, тоже скрыты.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False).exclude(
+            author_id__in=UserDeletion.objects.values('user_id')
+        )
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста'
     )
+    # Готовый HTML текста (posts/formatting.py): собирается при
+    # сохранении, чтобы не форматировать текст при каждом выводе.
+    text_html = models.TextField(default='', editable=False)
     pub_date = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(
         User,
@@ -44,15 +161,45 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True,
     )
+    # Число лайков. Меняется пачками из буфера в кэше (posts/likes.py),
+    # к выводу прибавляется ещё не перенесённая часть.
+    likes_count = models.PositiveIntegerField(
+        'Лайки', default=0, editable=False
+    )
+    # Число просмотров, буферизуется так же (posts/visits.py).
+    views_count = models.PositiveIntegerField(
+        'Просмотры', default=0, editable=False
+    )
+    # Номер версии для оптимистической блокировки при редактировании.
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Удалённый автором пост скрыт из лент, но остаётся в базе
+    # до переноса в архив командой archive_posts.
+    is_deleted = models.BooleanField('Удалён', default=False, editable=False)
+
+    objects = PostManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+        self.text_html = render_text(self.text)
+        exclude_counters(self, kwargs)
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -66,7 +213,11 @@ class Comment(models.Model):
         related_name='comments'
     )
     text = models.TextField()
+    text_html = models.TextField(default='', editable=False)
     created = models.DateTimeField(auto_now_add=True)
+    likes_count = models.PositiveIntegerField(
+        'Лайки', default=0, editable=False
+    )
 
     class Meta:
         verbose_name = 'Коментарий'
@@ -75,6 +226,123 @@ class Comment(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        self.text_html = render_text(self.text)
+        exclude_counters(self, kwargs)
+        super().save(*args, **kwargs)
+
+
+class PostLike(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='likes'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='post_likes'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Лайк поста'
+        verbose_name_plural = 'Лайки постов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'user'], name='unique_post_like'
+            )
+        ]
+
+
+class CommentLike(models.Model):
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='likes'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='comment_likes'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Лайк комментария'
+        verbose_name_plural = 'Лайки комментариев'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['comment', 'user'], name='unique_comment_like'
+            )
+        ]
+
+
+class PostTag(models.Model):
+    """Хэштег поста.
+
+    Дата публикации копируется из поста: лента тега читается по индексу
+    (tag, -pub_date) без сортировки и без просмотра чужих тегов.
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='tags'
+    )
+    tag = models.CharField('Тег', max_length=TAG_MAX_LENGTH)
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Тег поста'
+        verbose_name_plural = 'Теги постов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'tag'], name='unique_post_tag'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['tag', '-pub_date'],
+                name='posttag_tag_pub_date_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'#{self.tag}'
+
+
+class PostMention(models.Model):
+    """Упоминание пользователя в посте, для ленты «Упоминания»."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Упоминание'
+        verbose_name_plural = 'Упоминания'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'user'], name='unique_post_mention'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'],
+                name='mention_user_pub_date_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'@{self.user}'
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -95,3 +363,62 @@ class Follow(models.Model):
                 fields=['user', 'author'], name='unique_author_user_following'
             )
         ]
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из горячей таблицы командой archive_posts.
+
+    Первичный ключ совпадает с id исходного поста, поэтому старые
+    ссылки /posts/<post_id>/ продолжают работать.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    text_html = models.TextField(default='', editable=False)
+    pub_date = models.DateTimeField()
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+    )
+    image = models.ImageField(upload_to='posts/', blank=True)
+    archived = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments'
+    )
+    text = models.TextField()
+    text_html = models.TextField(default='', editable=False)
+    created = models.DateTimeField()
+
+    class Meta:
+        ordering = ['created']
+        verbose_name = 'Архивный коментарий'
+        verbose_name_plural = 'Архивные коментарии'
+
+    def __str__(self):
+        return self.text[:15]
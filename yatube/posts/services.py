@@ -0,0 +1,234 @@
+# Операции над постами, которые не укладываются в ModelForm.save().
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from sorl.thumbnail import delete as delete_thumbnails
+
+from core.edge import purge
+from core.jobs import start_job
+
+from . import bulk, sitemaps, stats
+from .formatting import render_text
+from .tags import sync_post_tags
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Post, UserDeletion
+)
+from .utils import FEED_SURROGATE_KEY, post_surrogate_keys
+
+# Сколько секунд помнить отправленный комментарий для защиты от дублей:
+# по токену формы - дольше, по тексту - только от двойного клика.
+COMMENT_TOKEN_TIMEOUT = 10 * 60
+COMMENT_TEXT_TIMEOUT = 10
+
+
+def update_post(form, expected_version):
+    """Сохраняет изменения поста из провалидированной формы PostForm.
+
+    В базу записываются только изменённые поля, одной командой UPDATE
+    с условием на версию поста. Если пост успел изменить кто-то ещё,
+    ничего не сохраняется и возвращается False.
+    """
+    post = form.instance
+    changed = form.changed_data
+    if not changed:
+        return True
+
+    values = {}
+    for name in changed:
+        field = Post._meta.get_field(name)
+        if name == 'image':
+            # Загружаем новый файл в хранилище (или очищаем поле).
+            values[field.attname] = field.pre_save(post, add=False)
+        else:
+            values[field.attname] = getattr(post, field.attname)
+    if 'text' in changed:
+        post.text_html = values['text_html'] = render_text(post.text)
+
+    updated = Post.objects.filter(
+        pk=post.pk, version=expected_version,
+    ).update(version=F('version') + 1, **values)
+    if not updated:
+        return False
+    post.version = expected_version + 1
+    keys = post_surrogate_keys(post, form.initial.get('group'))
+    purge(*keys)
+    stats.invalidate_latest(*keys)
+
+    if 'text' in changed:
+        sync_post_tags(post)
+    if 'group' in changed:
+        stats.post_moved(form.initial.get('group'), post.group_id,
+                         post.pub_date)
+        post._loaded_group_id = post.group_id
+    old_image = form.initial.get('image')
+    if 'image' in changed and old_image:
+        # Миниатюры старой картинки больше не нужны.
+        delete_thumbnails(old_image, delete_file=False)
+    return True
+
+
+def soft_delete_post(post):
+    """Скрывает пост из лент, не удаляя строку из базы."""
+    updated = Post.objects.filter(pk=post.pk).update(
+        is_deleted=True, version=F('version') + 1,
+    )
+    if updated:
+        post.is_deleted = True
+        stats.post_removed(post.group_id, post.pub_date)
+        keys = post_surrogate_keys(post)
+        purge(*keys)
+        stats.invalidate_latest(*keys)
+        sitemaps.invalidate_segment('posts', post.pk)
+    return bool(updated)
+
+
+def schedule_user_deletion(user):
+    """Сразу блокирует и скрывает пользователя, а его данные удаляет в фоне.
+
+    Отметка UserDeletion лежит в базе: если процесс перезапустится
+    раньше, чем задача закончится, удаление доделает resume_deletions.
+    """
+    user.is_active = False
+    user.save(update_fields=['is_active'])
+    UserDeletion.objects.get_or_create(user=user)
+    keys = [FEED_SURROGATE_KEY, f'author-{user.pk}']
+    purge(*keys)
+    stats.invalidate_latest(*keys)
+    return start_job(
+        f'Удаление пользователя {user.username}', bulk.delete_user, user.pk
+    )
+
+
+def schedule_group_deletion(group):
+    """Сразу скрывает группу, а посты от неё отвязывает в фоне."""
+    group.is_deleted = True
+    group.save(update_fields=['is_deleted'])
+    return start_job(
+        f'Удаление группы {group.slug}', bulk.delete_group, group.pk
+    )
+
+
+def archive_posts(cutoff, batch_size=500):
+    """Переносит посты старше cutoff вместе с комментариями в архив.
+
+    Работает пачками по batch_size постов, каждая пачка - отдельная
+    транзакция, чтобы не держать блокировку записи SQLite долго.
+    Удалённые посты в архив не попадают, а удаляются окончательно.
+    Возвращает пару (перенесено в архив, удалено).
+    """
+    archived = purged = 0
+    while True:
+        with transaction.atomic():
+            posts = list(
+                Post.all_objects.filter(pub_date__lt=cutoff)
+                .order_by('pk')[:batch_size]
+            )
+            if not posts:
+                break
+            ids = [post.pk for post in posts]
+            alive = [post for post in posts if not post.is_deleted]
+            ArchivedPost.objects.bulk_create(
+                ArchivedPost(
+                    id=post.pk,
+                    text=post.text,
+                    text_html=post.text_html,
+                    pub_date=post.pub_date,
+                    author_id=post.author_id,
+                    group_id=post.group_id,
+                    image=post.image.name,
+                )
+                for post in alive
+            )
+            ArchivedComment.objects.bulk_create(
+                ArchivedComment(
+                    id=comment.pk,
+                    post_id=comment.post_id,
+                    author_id=comment.author_id,
+                    text=comment.text,
+                    text_html=comment.text_html,
+                    created=comment.created,
+                )
+                for comment in Comment.objects.filter(
+                    post_id__in=[post.pk for post in alive]
+                )
+            )
+            Post.all_objects.filter(pk__in=ids).delete()
+        archived += len(alive)
+        purged += len(ids) - len(alive)
+    return archived, purged
+
+
+def text_purge_keys(objs):
+    """Ключи прокси-кэша страниц, на которых выводится текст objs."""
+    keys = set()
+    for obj in objs:
+        if isinstance(obj, (Comment, ArchivedComment)):
+            keys.add(f'post-{obj.post_id}')
+        else:
+            keys.update(post_surrogate_keys(obj))
+    return sorted(keys)
+
+
+def rerender_text(model, batch_size=500):
+    """Пересобирает text_html объектов model после изменения render_text.
+
+    Работает пачками по batch_size, обновляет только объекты, у которых
+    HTML изменился, и сбрасывает в прокси их страницы. Возвращает
+    количество обновлённых объектов.
+    """
+    manager = model._base_manager
+    updated = 0
+    for pks in bulk.iter_pk_chunks(manager.all(), batch_size):
+        changed = []
+        with transaction.atomic():
+            for obj in manager.filter(pk__in=pks):
+                text_html = render_text(obj.text)
+                if text_html != obj.text_html:
+                    obj.text_html = text_html
+                    changed.append(obj)
+            manager.bulk_update(changed, ['text_html'])
+        if changed:
+            purge(*text_purge_keys(changed))
+        updated += len(changed)
+    return updated
+
+
+def comment_dedup_key(author_id, post_id, token, text):
+    # Текст входит в ключ и с токеном: токен выдаётся один на страницу,
+    # и другой комментарий с той же страницы не должен считаться повтором.
+    # Токен присылает клиент, поэтому в ключ попадает только его хэш.
+    digest = hashlib.md5(text.encode()).hexdigest()
+    if token:
+        token = hashlib.md5(token.encode()).hexdigest()
+        return f'posts:comment:{author_id}:{token}:{digest}'
+    return f'posts:comment:{author_id}:{post_id}:{digest}'
+
+
+def create_comment(form, author, post_id, token=None):
+    """Сохраняет комментарий из формы CommentForm один раз.
+
+    Повторная отправка того же текста с тем же токеном (а без токена -
+    в течение нескольких секунд) не создаёт новую запись.
+    Возвращает пару (комментарий, создан ли он сейчас); комментарий
+    может быть None, если первая отправка ещё не сохранилась.
+    """
+    text = form.cleaned_data['text']
+    key = comment_dedup_key(author.pk, post_id, token, text)
+    timeout = COMMENT_TOKEN_TIMEOUT if token else COMMENT_TEXT_TIMEOUT
+    if not cache.add(key, 0, timeout):
+        comment_id = cache.get(key)
+        comment = Comment.objects.filter(pk=comment_id).first()
+        return comment, False
+    comment = form.save(commit=False)
+    comment.author = author
+    comment.post_id = post_id
+    try:
+        comment.save()
+    except Exception:
+        # Иначе ключ без id комментария блокировал бы повторную попытку.
+        cache.delete(key)
+        raise
+    cache.set(key, comment.pk, timeout)
+    return comment, True
@@ -0,0 +1,129 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.edge import purge
+
+from . import live, sitemaps, stats
+from .feeds import PK_CACHE_KEY
+from .tags import sync_post_tags
+from .models import Comment, Follow, Group, GroupStats, Post, User
+from .utils import post_surrogate_keys
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # Запоминаем группу, с которой пост загружен из базы, чтобы при
+    # сохранении заметить перенос в другую группу. Читаем __dict__,
+    # чтобы не загружать отложенное поле.
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def update_group_stats_on_save(sender, instance, created, **kwargs):
+    if created:
+        stats.post_added(instance.group_id, instance.pub_date)
+        live.post_published(instance)
+    elif not instance.is_deleted:
+        # Удалённый пост уже вычтен из статистики (soft_delete_post):
+        # перенос его в админке не должен снова прибавлять его группе.
+        stats.post_moved(
+            instance._loaded_group_id, instance.group_id, instance.pub_date
+        )
+    keys = post_surrogate_keys(instance, instance._loaded_group_id)
+    purge(*keys)
+    stats.invalidate_latest(*keys)
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Post)
+def update_post_tags(sender, instance, created, update_fields, **kwargs):
+    if update_fields is None or 'text' in update_fields:
+        sync_post_tags(instance, created)
+
+
+@receiver(post_delete, sender=Post)
+def update_group_stats_on_delete(sender, instance, **kwargs):
+    # Удалённый автором пост уже вычтен из статистики в soft_delete_post.
+    if not instance.is_deleted:
+        stats.post_removed(instance.group_id, instance.pub_date)
+    keys = post_surrogate_keys(instance)
+    purge(*keys)
+    stats.invalidate_latest(*keys)
+    sitemaps.invalidate_segment('posts', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_post_page(sender, instance, **kwargs):
+    purge(f'post-{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def purge_author_pages(sender, instance, **kwargs):
+    purge(f'author-{instance.author_id}')
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+    stats.invalidate_group_directory()
+    purge(f'group-{instance.pk}')
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_group_directory(sender, instance, **kwargs):
+    stats.invalidate_group_directory()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_feed_pk(sender, instance, **kwargs):
+    # Лента по slug удалённой или переименованной группы (или имени
+    # пользователя) не должна отвечать 304 по старому pk.
+    value = instance.slug if sender is Group else instance.username
+    cache.delete(PK_CACHE_KEY.format(sender._meta.model_name, value))
+
+
+# Раздел карты сайта и поля, от которых зависят его адреса.
+SITEMAP_FIELDS = {
+    Group: ('groups', ('slug',)),
+    User: ('authors', ('username', 'is_active')),
+}
+
+
+def sitemap_fields(instance):
+    # Читаем __dict__, чтобы не загружать отложенные поля.
+    fields = SITEMAP_FIELDS[type(instance)][1]
+    return tuple(instance.__dict__.get(field) for field in fields)
+
+
+@receiver(post_init, sender=Group)
+@receiver(post_init, sender=User)
+def remember_sitemap_fields(sender, instance, **kwargs):
+    instance._loaded_sitemap_fields = sitemap_fields(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=User)
+def invalidate_renamed_sitemap(sender, instance, created, **kwargs):
+    # Сегмент со старым slug или именем пользователя отдавал бы
+    # адреса, которых больше нет.
+    current = sitemap_fields(instance)
+    if not created and current != instance._loaded_sitemap_fields:
+        sitemaps.invalidate_segment(SITEMAP_FIELDS[sender][0], instance.pk)
+    instance._loaded_sitemap_fields = current
+
+
+@receiver(post_delete, sender=User)
+def forget_author_sitemap(sender, instance, **kwargs):
+    sitemaps.invalidate_segment('authors', instance.pk)
+
+
+@receiver(post_delete, sender=Group)
+def forget_group_sitemap(sender, instance, **kwargs):
+    sitemaps.invalidate_segment('groups', instance.pk)
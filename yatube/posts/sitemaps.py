@@ -0,0 +1,150 @@
+# Карта сайта, разбитая на сегменты по диапазонам id.
+#
+# Сегмент n раздела содержит объекты с id от n * SITEMAP_SEGMENT_SIZE
+# до (n + 1) * SITEMAP_SEGMENT_SIZE - 1. id в SQLite (AUTOINCREMENT)
+# только растут, поэтому сегмент, за которым уже есть объекты, новых
+# строк не получит: он «закрыт», собирается один раз и хранится
+# файлом в SITEMAP_ROOT. Каждый раз собирается только последний,
+# «открытый» сегмент. Ни OFFSET, ни COUNT(*) не используются.
+import glob
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.urls import reverse
+from django.utils.text import slugify
+
+from .models import Group, Post, User
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_OPEN = (
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+INDEX_OPEN = (
+    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+MAX_PK_CACHE_KEY = 'posts:sitemap_max_pk:{}'
+MAX_PK_TIMEOUT = 60
+
+
+def post_entries(start, end):
+    posts = Post.objects.filter(pk__gte=start, pk__lt=end).order_by('pk')
+    for pk, pub_date in posts.values_list('pk', 'pub_date').iterator():
+        yield reverse('posts:post_detail', args=[pk]), pub_date
+
+
+def author_entries(start, end):
+    users = User.objects.filter(
+        pk__gte=start, pk__lt=end, is_active=True,
+    ).order_by('pk')
+    for username in users.values_list('username', flat=True).iterator():
+        yield reverse('posts:profile', args=[username]), None
+
+
+def group_entries(start, end):
+    groups = Group.objects.filter(
+        pk__gte=start, pk__lt=end,
+    ).order_by('pk').values_list('slug', 'stats__last_pub_date')
+    for slug, last_pub_date in groups.iterator():
+        yield reverse('posts:group_list', args=[slug]), last_pub_date
+
+
+# Раздел карты: модель (по ней считается максимальный id) и функция,
+# которая отдаёт пары (путь, дата изменения) для диапазона id.
+SECTIONS = {
+    'posts': (Post, post_entries),
+    'authors': (User, author_entries),
+    'groups': (Group, group_entries),
+}
+
+
+def get_max_pk(section):
+    cache_key = MAX_PK_CACHE_KEY.format(section)
+    max_pk = cache.get(cache_key)
+    if max_pk is None:
+        model = SECTIONS[section][0]
+        max_pk = model._base_manager.aggregate(max_pk=Max('pk'))['max_pk']
+        max_pk = max_pk or 0
+        cache.set(cache_key, max_pk, MAX_PK_TIMEOUT)
+    return max_pk
+
+
+def segment_range(number):
+    size = settings.SITEMAP_SEGMENT_SIZE
+    return number * size, (number + 1) * size
+
+
+def segment_count(section):
+    return get_max_pk(section) // settings.SITEMAP_SEGMENT_SIZE + 1
+
+
+def is_closed(section, number):
+    return segment_range(number)[1] <= get_max_pk(section)
+
+
+def iter_urlset(base_url, entries):
+    yield XML_HEADER
+    yield URLSET_OPEN
+    for path, lastmod in entries:
+        line = f'<url><loc>{escape(base_url + path)}</loc>'
+        if lastmod is not None:
+            line += f'<lastmod>{lastmod.date().isoformat()}</lastmod>'
+        yield line + '</url>\n'
+    yield '</urlset>\n'
+
+
+def iter_segment(base_url, section, number):
+    entries = SECTIONS[section][1](*segment_range(number))
+    return iter_urlset(base_url, entries)
+
+
+def segment_path(base_url, section, number):
+    # Адреса в карте абсолютные, поэтому файлы хранятся по хостам.
+    return os.path.join(
+        settings.SITEMAP_ROOT, slugify(base_url), f'{section}-{number}.xml'
+    )
+
+
+def get_closed_segment(base_url, section, number):
+    """Путь к файлу закрытого сегмента; собирает его, если файла нет."""
+    path = segment_path(base_url, section, number)
+    if os.path.exists(path):
+        return path
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Пишем во временный файл и переименовываем: параллельный запрос
+    # не увидит недописанный файл.
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as file:
+        file.writelines(iter_segment(base_url, section, number))
+    os.replace(tmp_path, path)
+    return path
+
+
+def invalidate_segment(section, *pks):
+    """Удаляет файлы сегментов с объектами pks, например после удаления."""
+    numbers = {pk // settings.SITEMAP_SEGMENT_SIZE for pk in pks}
+    for number in sorted(numbers):
+        pattern = os.path.join(
+            settings.SITEMAP_ROOT, '*', f'{section}-{number}.xml'
+        )
+        for path in glob.glob(pattern):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def iter_index(base_url):
+    yield XML_HEADER
+    yield INDEX_OPEN
+    for section in SECTIONS:
+        for number in range(segment_count(section)):
+            path = reverse('posts:sitemap_segment', args=[section, number])
+            yield (
+                f'<sitemap><loc>{escape(base_url + path)}</loc></sitemap>\n'
+            )
+    yield '</sitemapindex>\n'
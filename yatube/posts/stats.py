@@ -0,0 +1,109 @@
+# Инкрементальное обновление статистики групп (GroupStats).
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, Max, Q, Value, When
+
+from core.context_processors.groups import NAV_GROUPS_CACHE_KEY
+
+from . import sitemaps
+from .models import Group, GroupStats, Post
+
+GROUP_DIRECTORY_CACHE_KEY = 'posts:group_directory'
+GROUP_DIRECTORY_TIMEOUT = 5 * 60
+# Время последнего поста ленты по её ключу прокси (feed, group-<id>,
+# author-<id>): по нему RSS/Atom отвечают 304 без запроса к базе.
+LATEST_CACHE_KEY = 'posts:latest:{}'
+LATEST_TIMEOUT = 60 * 60
+
+
+def invalidate_group_directory():
+    cache.delete_many([GROUP_DIRECTORY_CACHE_KEY, NAV_GROUPS_CACHE_KEY])
+
+
+def get_group_directory():
+    """Группы со статистикой: из кэша или одним запросом."""
+    groups = cache.get(GROUP_DIRECTORY_CACHE_KEY)
+    if groups is None:
+        groups = list(
+            Group.objects.select_related('stats').order_by('title')
+        )
+        cache.set(GROUP_DIRECTORY_CACHE_KEY, groups, GROUP_DIRECTORY_TIMEOUT)
+    return groups
+
+
+def latest_pub_date(key, queryset):
+    """Время последнего поста ленты key: из кэша или одним запросом."""
+    cache_key = LATEST_CACHE_KEY.format(key)
+    cached = cache.get(cache_key)
+    if cached is None:
+        # Кортеж, чтобы отличить «постов нет» от промаха кэша.
+        cached = (queryset.aggregate(latest=Max('pub_date'))['latest'],)
+        cache.set(cache_key, cached, LATEST_TIMEOUT)
+    return cached[0]
+
+
+def invalidate_latest(*keys):
+    """Сбрасывает время последнего поста лент с этими ключами.
+
+    Повторно - после коммита, на случай если параллельный запрос успел
+    закэшировать старое значение.
+    """
+    cache_keys = [LATEST_CACHE_KEY.format(key) for key in keys if key]
+    cache.delete_many(cache_keys)
+    transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+
+def refresh_group(group_id):
+    """Пересчитывает статистику группы по таблице постов."""
+    stats = Post.objects.filter(group_id=group_id).aggregate(
+        last_pub_date=Max('pub_date'),
+    )
+    stats['posts_count'] = Post.objects.filter(group_id=group_id).count()
+    GroupStats.objects.update_or_create(group_id=group_id, defaults=stats)
+    invalidate_group_directory()
+    # Дата последнего поста стоит в карте сайта как lastmod группы.
+    sitemaps.invalidate_segment('groups', group_id)
+
+
+def post_added(group_id, pub_date):
+    if group_id is None:
+        return
+    updated = GroupStats.objects.filter(group_id=group_id).update(
+        posts_count=F('posts_count') + 1,
+        last_pub_date=Case(
+            When(
+                Q(last_pub_date__isnull=True) | Q(last_pub_date__lt=pub_date),
+                then=Value(pub_date, output_field=DateTimeField()),
+            ),
+            default=F('last_pub_date'),
+        ),
+    )
+    if not updated:
+        refresh_group(group_id)
+        return
+    invalidate_group_directory()
+    sitemaps.invalidate_segment('groups', group_id)
+
+
+def post_removed(group_id, pub_date):
+    if group_id is None:
+        return
+    updated = GroupStats.objects.filter(
+        group_id=group_id, posts_count__gt=0,
+    ).update(posts_count=F('posts_count') - 1)
+    is_latest = GroupStats.objects.filter(
+        group_id=group_id, last_pub_date__lte=pub_date,
+    ).exists()
+    if not updated or is_latest:
+        # Удалили самый свежий пост: дату последнего поста берём
+        # по индексу (group, -pub_date).
+        refresh_group(group_id)
+        return
+    invalidate_group_directory()
+
+
+def post_moved(old_group_id, new_group_id, pub_date):
+    if old_group_id == new_group_id:
+        return
+    post_removed(old_group_id, pub_date)
+    post_added(new_group_id, pub_date)
@@ -0,0 +1,44 @@
+# Хэштеги и упоминания постов.
+#
+# Разбираются из текста при сохранении поста и хранятся в PostTag
+# и PostMention. При правке сравниваются с сохранёнными, и в базу
+# пишется только разница.
+from .formatting import extract_mentions, extract_tags
+from .models import PostMention, PostTag, User
+
+
+def mentioned_user_ids(post):
+    usernames = extract_mentions(post.text)
+    if not usernames:
+        return set()
+    # Упоминание самого себя в ленту упоминаний не попадает.
+    return set(
+        User.objects.filter(username__in=usernames)
+        .exclude(pk=post.author_id)
+        .values_list('pk', flat=True)
+    )
+
+
+def apply_diff(model, field, post, old, new):
+    removed = old - new
+    if removed:
+        model.objects.filter(
+            post=post, **{f'{field}__in': removed}
+        ).delete()
+    model.objects.bulk_create(
+        model(post=post, pub_date=post.pub_date, **{field: value})
+        for value in sorted(new - old)
+    )
+
+
+def sync_post_tags(post, created=False):
+    """Приводит теги и упоминания поста в соответствие с его текстом."""
+    tags = extract_tags(post.text)
+    user_ids = mentioned_user_ids(post)
+    if created:
+        old_tags = old_user_ids = set()
+    else:
+        old_tags = set(post.tags.values_list('tag', flat=True))
+        old_user_ids = set(post.mentions.values_list('user_id', flat=True))
+    apply_diff(PostTag, 'tag', post, old_tags, tags)
+    apply_diff(PostMention, 'user_id', post, old_user_ids, user_ids)
@@ -0,0 +1,333 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from posts.admin import PostAdmin
+from posts.changelist import EstimatedCountPaginator
+from posts.models import (
+    ArchivedPost, Comment, Follow, Group, GroupStats, Post, UserDeletion
+)
+from posts.services import schedule_group_deletion, schedule_user_deletion
+
+from .fixtures.factories import group_create, url_rev
+
+User = get_user_model()
+
+CHANGELIST_URL = '/admin/posts/post/'
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'Admin', 'admin@example.com', 'password'
+        )
+        cls.group = group_create()
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.admin, group=cls.group
+            )
+            for i in range(PostAdmin.list_per_page + 5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.admin, text='Комментарий'
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(PostAdminTests.admin)
+
+    def test_changelist_queries_do_not_depend_on_rows(self):
+        """Список постов не делает запросов на каждую строку."""
+        self.admin_client.get(CHANGELIST_URL)
+        # Сессия и пользователь берутся из кэша: остаются оценка числа
+        # постов и сами посты вместе с авторами и группами.
+        with self.assertNumQueries(2):
+            response = self.admin_client.get(CHANGELIST_URL)
+        self.assertEqual(response.status_code, 200)
+
+    def test_keyset_pages(self):
+        """Ссылка «Дальше» ведёт на посты с меньшими pk."""
+        response = self.admin_client.get(CHANGELIST_URL)
+        cl = response.context['cl']
+        rows = list(cl.result_list)
+        self.assertEqual(len(rows), PostAdmin.list_per_page)
+        self.assertEqual(cl.next_cursor, rows[-1].pk)
+
+        response = self.admin_client.get(CHANGELIST_URL + cl.next_page_url)
+        next_pks = [post.pk for post in response.context['cl'].result_list]
+        self.assertEqual(len(next_pks), 5)
+        self.assertTrue(all(pk < cl.next_cursor for pk in next_pks))
+        self.assertIsNone(response.context['cl'].next_cursor)
+
+    def test_sorted_changelist_uses_pages(self):
+        """При сортировке по столбцу навигация остаётся постраничной."""
+        response = self.admin_client.get(CHANGELIST_URL + '?o=2')
+        self.assertFalse(response.context['cl'].keyset)
+        self.assertContains(response, '?o=2&amp;p=1')
+
+    def test_estimated_count(self):
+        """Без фильтра число оценивается по pk, с фильтром - считается."""
+        paginator = EstimatedCountPaginator(Post.objects.order_by('pk'), 10)
+        self.assertGreaterEqual(paginator.count, len(PostAdminTests.posts))
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(text='Пост 1').order_by('pk'), 10
+        )
+        self.assertEqual(paginator.count, 1)
+
+    def test_comment_changelist(self):
+        """Список комментариев открывается."""
+        response = self.admin_client.get('/admin/posts/comment/')
+        self.assertContains(response, 'Комментарий')
+
+
+@override_settings(BACKGROUND_JOBS_SYNC=True, BULK_CHUNK_SIZE=2)
+class PostBulkActionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'Admin', 'admin@example.com', 'password'
+        )
+        cls.author = User.objects.create_user('Author')
+        cls.group = group_create()
+        cls.other_group = Group.objects.create(
+            title='Другая группа', slug='other', description='Описание',
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(PostBulkActionsTests.admin)
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост {i}',
+                author=PostBulkActionsTests.author,
+                group=PostBulkActionsTests.group,
+            )
+            for i in range(5)
+        ]
+        for post in self.posts:
+            Comment.objects.create(
+                post=post, author=PostBulkActionsTests.admin, text='Текст'
+            )
+
+    def run_action(self, action, posts, **data):
+        return self.admin_client.post(CHANGELIST_URL, {
+            'action': action,
+            '_selected_action': [post.pk for post in posts],
+            'index': 0,
+            **data,
+        }, follow=True)
+
+    def test_move_to_group(self):
+        """Посты переносятся в группу, статистика обеих групп верна."""
+        version = Post.objects.get(pk=self.posts[0].pk).version
+        response = self.run_action(
+            'move_to_group', self.posts[:3], group='other'
+        )
+        self.assertContains(response, 'запущена')
+        self.assertEqual(
+            Post.objects.filter(group=PostBulkActionsTests.other_group)
+            .count(), 3
+        )
+        self.assertEqual(GroupStats.objects.get(
+            group=PostBulkActionsTests.other_group).posts_count, 3)
+        self.assertEqual(GroupStats.objects.get(
+            group=PostBulkActionsTests.group).posts_count, 2)
+        self.assertEqual(
+            Post.objects.get(pk=self.posts[0].pk).version, version + 1
+        )
+
+    def test_move_to_missing_group(self):
+        """Несуществующая группа - сообщение об ошибке."""
+        response = self.run_action(
+            'move_to_group', self.posts, group='missing'
+        )
+        self.assertContains(response, 'не найдена')
+        self.assertEqual(
+            Post.objects.filter(group=PostBulkActionsTests.group).count(), 5
+        )
+
+    def test_delete_posts(self):
+        """Посты удаляются вместе с комментариями."""
+        self.run_action('delete_posts', self.posts[:3], post='yes')
+        self.assertEqual(Post.all_objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(GroupStats.objects.get(
+            group=PostBulkActionsTests.group).posts_count, 2)
+
+    def test_delete_author_posts(self):
+        """Удаляются все посты автора, а не только выбранные."""
+        self.run_action('delete_author_posts', self.posts[:1], post='yes')
+        self.assertFalse(Post.all_objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_purge_comments(self):
+        """Удаляются только комментарии выбранных постов."""
+        self.run_action('purge_comments', self.posts[:3], post='yes')
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 5)
+
+    def test_delete_actions_need_confirmation(self):
+        """Без подтверждения удаление не запускается."""
+        for action, text in (
+            ('delete_posts', 'Постов: 3'),
+            ('delete_author_posts', 'Author'),
+            ('purge_comments', 'Комментариев: 3'),
+        ):
+            with self.subTest(action=action):
+                response = self.run_action(action, self.posts[:3])
+                self.assertTemplateUsed(
+                    response, 'admin/posts/bulk_action_confirmation.html'
+                )
+                self.assertContains(response, text)
+                self.assertContains(
+                    response, f'name="action" value="{action}"'
+                )
+        self.assertEqual(Post.all_objects.count(), 5)
+        self.assertEqual(Comment.objects.count(), 5)
+
+    def test_confirmation_keeps_select_across(self):
+        """«Выбрать все» переходит со страницы подтверждения."""
+        response = self.run_action(
+            'delete_posts', self.posts[:1], select_across=1
+        )
+        self.assertContains(response, 'name="select_across" value="1"')
+        self.assertContains(response, 'Постов: 5')
+        self.run_action(
+            'delete_posts', self.posts[:1], select_across=1, post='yes'
+        )
+        self.assertFalse(Post.all_objects.exists())
+
+    def test_job_progress(self):
+        """Прогресс задачи доступен по ссылке из сообщения."""
+        response = self.run_action('delete_posts', self.posts, post='yes')
+        url = list(response.context['messages'])[0].message.split('"')[1]
+        job = self.admin_client.get(url).json()
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual((job['done'], job['total']), (5, 5))
+
+
+class BackgroundDeletionTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'Admin', 'admin@example.com', 'password'
+        )
+        cls.reader = User.objects.create_user('Reader')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(BackgroundDeletionTests.admin)
+        self.author = User.objects.create_user('Author')
+        self.group = group_create()
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=self.author, group=self.group
+            )
+            for i in range(3)
+        ]
+        self.reader_post = Post.objects.create(
+            text='Пост читателя', author=BackgroundDeletionTests.reader,
+            group=self.group,
+        )
+        Comment.objects.create(
+            post=self.reader_post, author=self.author, text='Текст'
+        )
+        Comment.objects.create(
+            post=self.posts[0], author=BackgroundDeletionTests.reader,
+            text='Текст',
+        )
+        Follow.objects.create(
+            user=BackgroundDeletionTests.reader, author=self.author
+        )
+        ArchivedPost.objects.create(
+            id=1000, text='Архив', pub_date=self.posts[0].pub_date,
+            author=self.author, group=self.group,
+        )
+
+    def test_user_is_blocked_before_job_runs(self):
+        """Пользователь блокируется сразу, данные удаляются позже."""
+        schedule_user_deletion(self.author)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertTrue(UserDeletion.objects.filter(user=self.author).exists())
+        self.assertEqual(
+            Post.all_objects.filter(author=self.author).count(), 3
+        )
+
+    def test_user_is_hidden_before_job_runs(self):
+        """Профиль и посты пользователя сразу пропадают с сайта."""
+        schedule_user_deletion(self.author)
+        self.assertEqual(list(Post.objects.all()), [self.reader_post])
+        response = Client().get(
+            url_rev('posts:profile', username=self.author.username)
+        )
+        self.assertEqual(response.status_code, 404)
+        response = Client().get(
+            url_rev('posts:post_detail', post_id=self.posts[0].pk)
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_resume_deletions(self):
+        """Команда доделывает прерванные удаления пользователей и групп."""
+        schedule_user_deletion(self.author)
+        schedule_group_deletion(self.group)
+        # Задачи не запустились: в TestCase нет коммита транзакции.
+        self.assertTrue(User.objects.filter(pk=self.author.pk).exists())
+        call_command('resume_deletions', stdout=StringIO())
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(UserDeletion.objects.exists())
+        self.assertFalse(Group.all_objects.exists())
+        self.assertEqual(list(Post.all_objects.all()), [self.reader_post])
+        self.assertIsNone(Post.objects.get().group)
+
+    @override_settings(BACKGROUND_JOBS_SYNC=True, BULK_CHUNK_SIZE=2)
+    def test_user_deletion(self):
+        """Удаляются пользователь, его посты, комментарии и подписки."""
+        job = schedule_user_deletion(self.author)
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.done, job.total)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Post.all_objects.all()), [self.reader_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).posts_count, 1
+        )
+
+    def test_group_is_hidden_before_job_runs(self):
+        """Группа сразу пропадает с сайта."""
+        schedule_group_deletion(self.group)
+        self.assertFalse(Group.objects.filter(pk=self.group.pk).exists())
+        response = Client().get(url_rev('posts:group_list', slug='slug'))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(BACKGROUND_JOBS_SYNC=True, BULK_CHUNK_SIZE=2)
+    def test_group_deletion(self):
+        """Посты остаются без группы, сама группа удаляется."""
+        schedule_group_deletion(self.group)
+        self.assertFalse(
+            Group.all_objects.filter(pk=self.group.pk).exists()
+        )
+        self.assertEqual(Post.all_objects.filter(group=None).count(), 4)
+        self.assertEqual(ArchivedPost.objects.get(id=1000).group, None)
+
+    @override_settings(BACKGROUND_JOBS_SYNC=True)
+    def test_admin_delete_user(self):
+        """Удаление из админки не собирает связанные объекты."""
+        url = f'/admin/auth/user/{self.author.pk}/delete/'
+        response = self.admin_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Пост 0')
+        self.admin_client.post(url, {'post': 'yes'})
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
@@ -0,0 +1,144 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.utils import timezone
+
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Group, GroupStats, Post
+)
+
+from .fixtures.factories import group_create, url_rev
+
+User = get_user_model()
+
+
+class SoftDeleteAndArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user('Author')
+        cls.user = User.objects.create_user('User')
+        cls.group = group_create()
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+        self.post = Post.objects.create(
+            text='Текст поста', author=self.author, group=self.group
+        )
+
+    def make_old(self, post, days=400):
+        Post.all_objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=days)
+        )
+
+    def test_author_soft_deletes_post(self):
+        """Удалённый автором пост пропадает из лент и со страницы поста."""
+        response = self.author_client.post(
+            url_rev('posts:post_delete', post_id=self.post.id)
+        )
+        self.assertRedirects(
+            response, url_rev('posts:profile', username=self.author)
+        )
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertTrue(Post.all_objects.filter(pk=self.post.pk).exists())
+        response = self.guest_client.get(
+            url_rev('posts:post_detail', post_id=self.post.id)
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.guest_client.get(
+            url_rev('posts:group_list', slug=self.group.slug)
+        )
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_non_author_cannot_delete_post(self):
+        """Чужой пост удалить нельзя."""
+        self.user_client.post(
+            url_rev('posts:post_delete', post_id=self.post.id)
+        )
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_archive_moves_old_posts_with_comments(self):
+        """Старые посты с комментариями уходят в архив."""
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        fresh = Post.objects.create(text='Свежий', author=self.author)
+        self.make_old(self.post)
+
+        call_command('archive_posts', days=365, stdout=StringIO())
+
+        self.assertFalse(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertTrue(Post.objects.filter(pk=fresh.pk).exists())
+        self.assertTrue(ArchivedPost.objects.filter(pk=self.post.pk).exists())
+        self.assertEqual(
+            ArchivedComment.objects.filter(post_id=self.post.pk).count(), 1
+        )
+
+    def test_archive_purges_deleted_posts(self):
+        """Старые удалённые посты в архив не попадают."""
+        Post.all_objects.filter(pk=self.post.pk).update(is_deleted=True)
+        self.make_old(self.post)
+
+        call_command('archive_posts', days=365, stdout=StringIO())
+
+        self.assertFalse(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(
+            ArchivedPost.objects.filter(pk=self.post.pk).exists()
+        )
+
+    def test_purge_deleted_post_keeps_group_stats(self):
+        """Удалённый автором пост вычитается из статистики группы раз."""
+        for _ in range(2):
+            Post.objects.create(
+                text='Ещё пост', author=self.author, group=self.group
+            )
+        self.author_client.post(
+            url_rev('posts:post_delete', post_id=self.post.id)
+        )
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.posts_count, 2)
+        self.make_old(self.post)
+
+        call_command('archive_posts', days=365, stdout=StringIO())
+
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 2)
+
+    def test_moving_deleted_post_keeps_group_stats(self):
+        """Перенос удалённого поста в другую группу не меняет статистику."""
+        other = Group.objects.create(title='Другая', slug='other')
+        self.author_client.post(
+            url_rev('posts:post_delete', post_id=self.post.id)
+        )
+        post = Post.all_objects.get(pk=self.post.pk)
+        post.group = other
+        post.save()
+        self.assertEqual(GroupStats.objects.get(group=other).posts_count, 0)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).posts_count, 0
+        )
+
+    def test_post_detail_falls_back_to_archive(self):
+        """Страница архивного поста открывается по старому адресу."""
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        self.make_old(self.post)
+        call_command('archive_posts', days=365, stdout=StringIO())
+
+        response = self.author_client.get(
+            url_rev('posts:post_detail', post_id=self.post.id)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_archived'])
+        self.assertContains(response, 'Комментарий')
+        self.assertNotContains(response, 'Редактировать')
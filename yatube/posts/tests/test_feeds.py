@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from posts.models import Post
+
+from .fixtures.factories import group_create, url_rev
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user('Author')
+        cls.group = group_create()
+        cls.post = Post.objects.create(
+            text='Текст поста', author=cls.author, group=cls.group
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feeds_list_posts(self):
+        """Все ленты отдаются и содержат пост."""
+        urls = {
+            url_rev('posts:feed_rss'): 'application/rss+xml',
+            url_rev('posts:feed_atom'): 'application/atom+xml',
+            url_rev('posts:group_rss', slug='slug'): 'application/rss+xml',
+            url_rev('posts:group_atom', slug='slug'): 'application/atom+xml',
+            url_rev('posts:profile_rss', username='Author'):
+                'application/rss+xml',
+            url_rev('posts:profile_atom', username='Author'):
+                'application/atom+xml',
+        }
+        for url, content_type in urls.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                self.assertContains(response, 'Текст поста')
+                self.assertIn('ETag', response)
+                self.assertIn('Last-Modified', response)
+
+    def test_unknown_group_and_author(self):
+        """Лента несуществующей группы или автора - 404."""
+        for url in (
+            url_rev('posts:group_rss', slug='missing'),
+            url_rev('posts:profile_rss', username='missing'),
+        ):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    def test_not_modified_without_queries(self):
+        """Повторный запрос с ETag получает 304 без запросов к базе."""
+        url = url_rev('posts:group_rss', slug='slug')
+        response = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+
+        response = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_etag(self):
+        """Новый пост в группе меняет ETag ленты группы и автора."""
+        urls = (
+            url_rev('posts:group_rss', slug='slug'),
+            url_rev('posts:profile_atom', username='Author'),
+            url_rev('posts:feed_rss'),
+        )
+        etags = [self.guest_client.get(url)['ETag'] for url in urls]
+        Post.objects.create(
+            text='Новый пост', author=FeedTests.author, group=FeedTests.group
+        )
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Новый пост')
@@ -1,14 +1,17 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.conf import settings
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.db import DatabaseError
 from .fixtures.factories import post_create, group_create, url_rev
 
-from posts.models import Post, Comment
+from posts.models import Post, Comment, Group, GroupStats
+from posts.services import comment_dedup_key
 
 User = get_user_model()
 
@@ -107,6 +110,93 @@ class PostCreateFormTests(TestCase):
             'Изменённый текст поста'
         )
 
+    def test_form_edit_stale_version(self):
+        """Правка устаревшей версии поста не затирает чужие изменения."""
+        post = PostCreateFormTests.post
+        Post.objects.filter(pk=post.pk).update(text='Чужая правка',
+                                               version=post.version + 1)
+
+        response = self.author_client.post(
+            url_rev('posts:post_edit', post_id=post.id),
+            data={'text': 'Моя правка', 'version': post.version},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].non_field_errors())
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).text, 'Чужая правка'
+        )
+
+    def test_form_edit_conflict_shows_current_post(self):
+        """После конфликта форма показывает текущий пост и его версию."""
+        post = PostCreateFormTests.post
+        Post.objects.filter(pk=post.pk).update(text='Чужая правка',
+                                               version=post.version + 1)
+
+        response = self.author_client.post(
+            url_rev('posts:post_edit', post_id=post.id),
+            data={'text': 'Моя правка', 'version': post.version},
+        )
+
+        self.assertEqual(response.context['version'], post.version + 1)
+        self.assertEqual(
+            response.context['form']['text'].value(), 'Чужая правка'
+        )
+
+    def test_form_edit_invalid_version(self):
+        """Правка с нечисловой версией не сохраняется."""
+        post = PostCreateFormTests.post
+        for version in ('', 'abc', '-1'):
+            with self.subTest(version=version):
+                response = self.author_client.post(
+                    url_rev('posts:post_edit', post_id=post.id),
+                    data={'text': 'Правка без версии', 'version': version},
+                )
+                self.assertTrue(response.context['form'].non_field_errors())
+                self.assertEqual(Post.objects.get(pk=post.pk).text, post.text)
+
+    def test_form_edit_writes_only_changed_fields(self):
+        """Правка без изменений не меняет версию, с изменениями - меняет."""
+        post = PostCreateFormTests.post
+        group = PostCreateFormTests.group
+        form_data = {
+            'text': post.text,
+            'group': group.id,
+            'version': post.version,
+        }
+        self.author_client.post(
+            url_rev('posts:post_edit', post_id=post.id), data=form_data
+        )
+        self.assertEqual(Post.objects.get(pk=post.pk).version, post.version)
+
+        form_data['text'] = 'Новый текст'
+        self.author_client.post(
+            url_rev('posts:post_edit', post_id=post.id), data=form_data
+        )
+        edited = Post.objects.get(pk=post.pk)
+        self.assertEqual(edited.text, 'Новый текст')
+        self.assertEqual(edited.text_html, '<p>Новый текст</p>')
+        self.assertEqual(edited.version, post.version + 1)
+        self.assertEqual(edited.author, PostCreateFormTests.author)
+
+    def test_form_edit_moves_post_between_groups(self):
+        """Перенос поста в другую группу обновляет статистику групп."""
+        post = PostCreateFormTests.post
+        group = PostCreateFormTests.group
+        other_group = Group.objects.create(
+            title='Другая группа', slug='other', description='-'
+        )
+        self.author_client.post(
+            url_rev('posts:post_edit', post_id=post.id),
+            data={'text': post.text, 'group': other_group.id},
+        )
+        self.assertEqual(
+            GroupStats.objects.get(group=group).posts_count, 0
+        )
+        self.assertEqual(
+            GroupStats.objects.get(group=other_group).posts_count, 1
+        )
+
     def test_author_comment(self):
         """комментировать посты может только авторизованный пользователь;"""
         post = PostCreateFormTests.post
@@ -130,6 +220,85 @@ class PostCreateFormTests(TestCase):
             ).exists()
         )
 
+    def test_comment_duplicate_submit(self):
+        """Повторная отправка формы с тем же токеном не создаёт дубль."""
+        post = PostCreateFormTests.post
+        form_data = {'text': 'Двойной клик', 'token': 'abc'}
+        url = url_rev('posts:add_comment', post_id=post.id)
+        self.author_client.post(url, data=form_data)
+        self.author_client.post(url, data=form_data)
+        self.assertEqual(
+            Comment.objects.filter(text='Двойной клик').count(), 1
+        )
+
+    def test_comment_same_token_other_text(self):
+        """Другой комментарий с той же страницы (тот же токен) сохраняется."""
+        post = PostCreateFormTests.post
+        url = url_rev('posts:add_comment', post_id=post.id)
+        for text in ('Первый с страницы', 'Второй с страницы'):
+            response = self.author_client.post(
+                url, data={'text': text, 'token': 'page'},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+            self.assertTrue(response.json()['created'])
+        self.assertEqual(
+            Comment.objects.filter(text__endswith='с страницы').count(), 2
+        )
+
+    def test_comment_retry_after_failed_save(self):
+        """После ошибки сохранения повторная отправка создаёт комментарий."""
+        post = PostCreateFormTests.post
+        form_data = {'text': 'Повтор после ошибки', 'token': 'retry'}
+        url = url_rev('posts:add_comment', post_id=post.id)
+        with mock.patch.object(
+            Comment, 'save', side_effect=DatabaseError('database is locked')
+        ):
+            with self.assertRaises(DatabaseError):
+                self.author_client.post(url, data=form_data)
+        self.author_client.post(url, data=form_data)
+        self.assertEqual(
+            Comment.objects.filter(text='Повтор после ошибки').count(), 1
+        )
+
+    def test_comment_ajax_duplicate_in_flight(self):
+        """Повтор, пока первая отправка не сохранилась, получает 409."""
+        post = PostCreateFormTests.post
+        form_data = {'text': 'Ещё сохраняется', 'token': 'x' * 10000}
+        key = comment_dedup_key(
+            PostCreateFormTests.author.pk, post.id,
+            form_data['token'], form_data['text'],
+        )
+        self.assertLess(len(key), 250)
+        cache.add(key, 0)
+        response = self.author_client.post(
+            url_rev('posts:add_comment', post_id=post.id), data=form_data,
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'pending': True})
+        self.assertFalse(Comment.objects.filter(text='Ещё сохраняется'))
+
+    def test_comment_ajax_returns_fragment(self):
+        """AJAX-запрос получает JSON с разметкой нового комментария."""
+        post = PostCreateFormTests.post
+        response = self.author_client.post(
+            url_rev('posts:add_comment', post_id=post.id),
+            data={'text': 'Комментарий без перезагрузки'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        data = response.json()
+        self.assertTrue(data['created'])
+        self.assertIn('Комментарий без перезагрузки', data['html'])
+        self.assertTrue(Comment.objects.filter(pk=data['id']).exists())
+
+    def test_comment_to_missing_post(self):
+        """Комментарий к несуществующему посту возвращает 404."""
+        response = self.author_client.post(
+            url_rev('posts:add_comment', post_id=100500),
+            data={'text': 'Комментарий'},
+        )
+        self.assertEqual(response.status_code, 404)
+
     def test_no_author_comment(self):
         """не авторизованный пользователь не может комментировать;"""
         post = PostCreateFormTests.post
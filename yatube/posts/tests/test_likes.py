@@ -0,0 +1,150 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+
+from core.counters import get_cache
+from core.jobs import start_job
+from posts import bulk
+from posts.likes import comment_likes, post_likes
+from posts.models import Comment, CommentLike, Post, PostLike
+
+from .fixtures.factories import url_rev
+
+User = get_user_model()
+
+
+class LikeTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user('Author')
+        cls.user = User.objects.create_user('User')
+        cls.post = Post.objects.create(text='Текст поста', author=cls.author)
+        cls.comment = Comment.objects.create(
+            text='Комментарий', author=cls.author, post=cls.post
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        get_cache().clear()
+        self.guest_client = Client()
+        self.user_client = Client()
+        self.user_client.force_login(LikeTests.user)
+
+    def like_url(self):
+        return url_rev('posts:post_like', post_id=LikeTests.post.pk)
+
+    def test_like_toggles(self):
+        """Повторный лайк снимает первый, счётчик берётся из буфера."""
+        response = self.user_client.post(
+            self.like_url(), HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.json(), {'liked': True, 'count': 1})
+        self.assertTrue(PostLike.objects.filter(
+            post=LikeTests.post, user=LikeTests.user
+        ).exists())
+        # В базе счётчик ещё не изменился: приращение лежит в кэше.
+        self.assertEqual(
+            Post.objects.get(pk=LikeTests.post.pk).likes_count, 0
+        )
+        response = self.user_client.post(
+            self.like_url(), HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.json(), {'liked': False, 'count': 0})
+        self.assertFalse(PostLike.objects.exists())
+
+    def test_counts_on_pages(self):
+        """Ленты и страница поста показывают счётчик с буфером."""
+        self.user_client.post(self.like_url())
+        self.user_client.post(
+            url_rev('posts:comment_like', comment_id=LikeTests.comment.pk)
+        )
+        response = self.user_client.get(url_rev('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertEqual(post.likes_count, 1)
+        self.assertTrue(post.liked)
+        response = self.user_client.get(
+            url_rev('posts:post_detail', post_id=LikeTests.post.pk)
+        )
+        self.assertEqual(response.context['post'].likes_count, 1)
+        comment = response.context['comments'][0]
+        self.assertEqual(comment.likes_count, 1)
+        self.assertTrue(comment.liked)
+
+    def test_index_after_like_not_from_cache(self):
+        """Вернувшись на главную после лайка, пользователь видит свой лайк."""
+        self.user_client.get(url_rev('posts:index'))
+        self.user_client.post(self.like_url(), {'next': '/'})
+        response = self.user_client.get(url_rev('posts:index'))
+        self.assertTrue(response.context['page_obj'][0].liked)
+
+    def test_flush_writes_counts(self):
+        """После сброса буфера счётчики лежат в базе."""
+        self.user_client.post(self.like_url())
+        self.user_client.post(
+            url_rev('posts:comment_like', comment_id=LikeTests.comment.pk)
+        )
+        for counter in (post_likes, comment_likes):
+            counter.flush()
+            counter.flush()
+        self.assertEqual(
+            Post.objects.get(pk=LikeTests.post.pk).likes_count, 1
+        )
+        self.assertEqual(
+            Comment.objects.get(pk=LikeTests.comment.pk).likes_count, 1
+        )
+
+    def test_flush_recounts_lost_increment(self):
+        """Пропавшее из кэша приращение не искажает счётчик в базе."""
+        self.user_client.post(self.like_url())
+        gen = post_likes.generations()[0]
+        get_cache().delete(post_likes.key(gen, LikeTests.post.pk))
+        post_likes.flush()
+        post_likes.flush()
+        self.assertEqual(
+            Post.objects.get(pk=LikeTests.post.pk).likes_count, 1
+        )
+
+    def test_save_keeps_flushed_count(self):
+        """Сохранение загруженного раньше поста не затирает счётчик."""
+        post = Post.objects.get(pk=LikeTests.post.pk)
+        Post.objects.filter(pk=post.pk).update(likes_count=7)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(Post.objects.get(pk=post.pk).likes_count, 7)
+
+    def test_like_requires_login_and_post(self):
+        """Гостя отправляет на вход, GET и чужой пост не принимаются."""
+        response = self.guest_client.post(self.like_url())
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.user_client.get(self.like_url()).status_code,
+                         405)
+        response = self.user_client.post(
+            url_rev('posts:post_like', post_id=1000)
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_redirects_to_next(self):
+        """После лайка - назад на страницу, с которой он поставлен."""
+        next_url = url_rev('posts:profile', username='Author')
+        response = self.user_client.post(self.like_url(), {'next': next_url})
+        self.assertRedirects(response, next_url)
+        response = self.user_client.post(
+            self.like_url(), {'next': 'https://evil.example/'}
+        )
+        self.assertRedirects(response, url_rev('posts:index'))
+
+    @override_settings(BACKGROUND_JOBS_SYNC=True)
+    def test_delete_user_removes_likes(self):
+        """Удаление пользователя удаляет его лайки и вычитает их."""
+        self.user_client.post(self.like_url())
+        post_likes.flush()
+        post_likes.flush()
+        start_job('test', bulk.delete_user, LikeTests.user.pk)
+        self.assertFalse(PostLike.objects.exists())
+        self.assertFalse(CommentLike.objects.exists())
+        post_likes.flush()
+        post_likes.flush()
+        self.assertEqual(
+            Post.objects.get(pk=LikeTests.post.pk).likes_count, 0
+        )
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from posts.models import Follow, Post
+
+from .fixtures.factories import group_create, url_rev
+
+User = get_user_model()
+
+
+class LiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user('Author')
+        cls.other = User.objects.create_user('Other')
+        cls.reader = User.objects.create_user('Reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = group_create()
+        cls.first = Post.objects.create(
+            text='Первый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(LiveTests.reader)
+
+    def test_new_posts_count(self):
+        """Ответ сообщает число постов новее since и последний id."""
+        Post.objects.create(text='Второй', author=LiveTests.author)
+        latest = Post.objects.create(text='Третий', author=LiveTests.other)
+        response = self.guest_client.get(
+            url_rev('posts:live_index'), {'since': LiveTests.first.pk}
+        )
+        self.assertEqual(response.json(), {'count': 2, 'latest': latest.pk})
+
+    def test_invalid_since(self):
+        """Без числового since запрос отклоняется."""
+        for params in ({}, {'since': 'abc'}, {'since': '-1'}):
+            with self.subTest(params=params):
+                response = self.guest_client.get(
+                    url_rev('posts:live_index'), params
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_no_queries_without_new_posts(self):
+        """Без новых постов ответ берётся из кэша без запросов к базе."""
+        latest = Post.objects.create(text='Второй', author=LiveTests.author)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                url_rev('posts:live_index'), {'since': latest.pk}
+            )
+        self.assertEqual(response.json(), {'count': 0, 'latest': latest.pk})
+
+    def test_group_and_follow_scopes(self):
+        """Группа и избранное считают только свои посты."""
+        since = LiveTests.first.pk
+        Post.objects.create(text='Вне группы', author=LiveTests.other)
+        in_group = Post.objects.create(
+            text='В группе', author=LiveTests.author, group=LiveTests.group
+        )
+        response = self.guest_client.get(
+            url_rev('posts:live_group', slug='slug'), {'since': since}
+        )
+        self.assertEqual(response.json(), {'count': 1, 'latest': in_group.pk})
+        response = self.reader_client.get(
+            url_rev('posts:live_follow'), {'since': since}
+        )
+        self.assertEqual(response.json(), {'count': 1, 'latest': in_group.pk})
+
+    def test_unknown_group_and_guest_follow(self):
+        """Несуществующая группа - 404, избранное - только после входа."""
+        response = self.guest_client.get(
+            url_rev('posts:live_group', slug='missing'), {'since': 0}
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.guest_client.get(url_rev('posts:live_follow'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_banner_on_first_page(self):
+        """Первая страница ленты опрашивает новые посты после верхнего."""
+        response = self.guest_client.get(url_rev('posts:index'))
+        self.assertContains(
+            response,
+            f"{url_rev('posts:live_index')}?since={LiveTests.first.pk}"
+        )
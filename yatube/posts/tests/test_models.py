@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import Comment, Group, Post
 
 User = get_user_model()
 
@@ -33,3 +36,44 @@ class PostModelTest(TestCase):
         модели Group совподает с ожидаемым."""
         group = PostModelTest.group
         self.assertEqual('Название группы', str(group))
+
+
+class TextHtmlTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user('Author')
+
+    def test_post_text_rendered_on_save(self):
+        """HTML текста поста собирается при сохранении и экранирован."""
+        post = Post.objects.create(
+            author=TextHtmlTest.author,
+            text='<b>жирный</b> http://example.com\n\nвторой абзац',
+        )
+        self.assertEqual(
+            post.text_html,
+            '<p>&lt;b&gt;жирный&lt;/b&gt; <a href="http://example.com" '
+            'rel="nofollow">http://example.com</a></p>\n\n'
+            '<p>второй абзац</p>'
+        )
+
+    def test_comment_text_rendered_on_save(self):
+        """HTML текста комментария собирается при сохранении."""
+        post = Post.objects.create(author=TextHtmlTest.author, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=TextHtmlTest.author, text='<i>комментарий</i>'
+        )
+        self.assertEqual(
+            comment.text_html, '<p>&lt;i&gt;комментарий&lt;/i&gt;</p>'
+        )
+
+    def test_rerender_command(self):
+        """rerender_text пересобирает только устаревший HTML."""
+        post = Post.objects.create(author=TextHtmlTest.author, text='Пост')
+        Post.objects.create(author=TextHtmlTest.author, text='Другой пост')
+        Post.objects.filter(pk=post.pk).update(text_html='старый')
+        out = StringIO()
+        call_command('rerender_text', 'post', stdout=out)
+        self.assertIn('post: обновлено 1', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>Пост</p>')
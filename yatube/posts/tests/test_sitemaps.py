@@ -0,0 +1,158 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+
+from posts.models import Group, Post
+
+from .fixtures.factories import url_rev
+
+User = get_user_model()
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(SITEMAP_ROOT=TEMP_SITEMAP_ROOT, SITEMAP_SEGMENT_SIZE=2)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user('Author')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.author)
+            for i in range(5)
+        ]
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+        self.guest_client = Client()
+
+    def segment_url(self, number, section='posts'):
+        return url_rev(
+            'posts:sitemap_segment', section=section, number=number
+        )
+
+    def segment_number(self, obj):
+        return obj.pk // 2
+
+    def segment_file(self, number, section='posts'):
+        return os.path.join(
+            TEMP_SITEMAP_ROOT, 'httptestserver', f'{section}-{number}.xml'
+        )
+
+    def test_index_lists_segments(self):
+        """Индекс содержит все сегменты постов."""
+        response = self.guest_client.get(url_rev('posts:sitemap'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        last = self.segment_number(SitemapTests.posts[-1])
+        for number in range(last + 1):
+            with self.subTest(number=number):
+                self.assertContains(response, self.segment_url(number))
+        self.assertNotContains(response, self.segment_url(last + 1))
+
+    def test_closed_segment_served_from_file(self):
+        """Закрытый сегмент собирается один раз и отдаётся из файла."""
+        number = self.segment_number(SitemapTests.posts[0])
+        url = self.segment_url(number)
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content)
+        self.assertIn(
+            url_rev('posts:post_detail', post_id=SitemapTests.posts[0].pk)
+            .encode(), content
+        )
+        self.assertTrue(os.path.exists(self.segment_file(number)))
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+            self.assertEqual(b''.join(response.streaming_content), content)
+
+    def test_open_segment_not_stored(self):
+        """Последний сегмент собирается заново и на диск не пишется."""
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        number = self.segment_number(post)
+        response = self.guest_client.get(self.segment_url(number))
+        content = b''.join(response.streaming_content)
+        self.assertIn(
+            url_rev('posts:post_detail', post_id=post.pk).encode(), content
+        )
+        self.assertFalse(os.path.exists(self.segment_file(number)))
+
+    def test_delete_invalidates_segment(self):
+        """Удаление поста удаляет файл его сегмента."""
+        post = SitemapTests.posts[0]
+        number = self.segment_number(post)
+        self.guest_client.get(self.segment_url(number))
+        self.assertTrue(os.path.exists(self.segment_file(number)))
+        Post.objects.filter(pk=post.pk).first().delete()
+        self.assertFalse(os.path.exists(self.segment_file(number)))
+        response = self.guest_client.get(self.segment_url(number))
+        self.assertNotIn(
+            url_rev('posts:post_detail', post_id=post.pk).encode(),
+            b''.join(response.streaming_content)
+        )
+
+    def test_rename_invalidates_segment(self):
+        """Смена slug группы или имени пользователя удаляет их сегмент."""
+        groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(5)
+        ]
+        users = [User.objects.create_user(f'User{i}') for i in range(5)]
+        for section, obj, field in (
+            ('groups', groups[0], 'slug'),
+            ('authors', users[0], 'username'),
+        ):
+            with self.subTest(section=section):
+                number = self.segment_number(obj)
+                path = self.segment_file(number, section)
+                self.guest_client.get(self.segment_url(number, section))
+                self.assertTrue(os.path.exists(path))
+                obj = type(obj).objects.get(pk=obj.pk)
+                obj.save()
+                self.assertTrue(os.path.exists(path))
+                setattr(obj, field, 'renamed')
+                obj.save()
+                self.assertFalse(os.path.exists(path))
+                response = self.guest_client.get(
+                    self.segment_url(number, section)
+                )
+                self.assertIn(
+                    b'/renamed/', b''.join(response.streaming_content)
+                )
+
+    def test_new_post_invalidates_group_segment(self):
+        """Новый пост в группе сбрасывает её сегмент с lastmod."""
+        groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(5)
+        ]
+        number = self.segment_number(groups[0])
+        path = self.segment_file(number, 'groups')
+        self.guest_client.get(self.segment_url(number, 'groups'))
+        self.assertTrue(os.path.exists(path))
+        Post.objects.create(
+            text='Новый пост', author=SitemapTests.author, group=groups[0]
+        )
+        self.assertFalse(os.path.exists(path))
+        response = self.guest_client.get(self.segment_url(number, 'groups'))
+        self.assertIn(b'<lastmod>', b''.join(response.streaming_content))
+
+    def test_unknown_segment(self):
+        """Неизвестный раздел или сегмент за последним - 404."""
+        for url in (
+            url_rev('posts:sitemap_segment', section='missing', number=0),
+            self.segment_url(1000),
+        ):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
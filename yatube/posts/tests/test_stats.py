@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from posts.models import Group, GroupStats, Post
+
+from .fixtures.factories import group_create, url_rev
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user('Author')
+        cls.group = group_create()
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other',
+            description='Описание другой группы',
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_stats_created_with_group(self):
+        """Для новой группы создаётся пустая статистика."""
+        stats = self.stats(GroupStatsTests.group)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertIsNone(stats.last_pub_date)
+
+    def test_post_create_and_delete(self):
+        """Создание и удаление поста меняют счётчик и дату."""
+        group = GroupStatsTests.group
+        first = Post.objects.create(
+            text='Первый', author=GroupStatsTests.author, group=group
+        )
+        second = Post.objects.create(
+            text='Второй', author=GroupStatsTests.author, group=group
+        )
+        stats = self.stats(group)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.last_pub_date, second.pub_date)
+
+        second.delete()
+        stats = self.stats(group)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.last_pub_date, first.pub_date)
+
+    def test_post_moved_between_groups(self):
+        """Перенос поста в другую группу обновляет обе группы."""
+        group = GroupStatsTests.group
+        other_group = GroupStatsTests.other_group
+        post = Post.objects.create(
+            text='Пост', author=GroupStatsTests.author, group=group
+        )
+        post = Post.objects.get(pk=post.pk)
+        post.group = other_group
+        post.save()
+        self.assertEqual(self.stats(group).posts_count, 0)
+        self.assertIsNone(self.stats(group).last_pub_date)
+        self.assertEqual(self.stats(other_group).posts_count, 1)
+
+    def test_group_index(self):
+        """Каталог групп показывает статистику и берётся из кэша."""
+        Post.objects.create(
+            text='Пост',
+            author=GroupStatsTests.author,
+            group=GroupStatsTests.group,
+        )
+        response = self.guest_client.get(url_rev('posts:group_index'))
+        self.assertTemplateUsed(response, 'posts/group_index.html')
+        groups = response.context['groups']
+        self.assertEqual(len(groups), 2)
+        self.assertContains(response, 'Всего постов: 1')
+        with self.assertNumQueries(0):
+            self.guest_client.get(url_rev('posts:group_index'))
@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+
+from core.jobs import start_job
+from posts import bulk
+from posts.formatting import extract_mentions, extract_tags
+from posts.models import Post, PostMention, PostTag
+
+from .fixtures.factories import url_rev
+
+User = get_user_model()
+
+
+class ExtractTest(TestCase):
+    def test_extract_tags(self):
+        """Хэштеги разбираются без якорей ссылок и HTML-сущностей."""
+        self.assertEqual(
+            extract_tags('#Django и #питон, http://site/#anchor &#39; a#b'),
+            {'django', 'питон'},
+        )
+
+    def test_extract_mentions(self):
+        """Упоминания разбираются без e-mail и точки в конце."""
+        self.assertEqual(
+            extract_mentions('Привет, @Reader. Пиши на mail@example.com'),
+            {'Reader'},
+        )
+
+
+class TagFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user('Author')
+        cls.reader = User.objects.create_user('Reader')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(TagFeedTests.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(TagFeedTests.reader)
+
+    def create_post(self, text):
+        return Post.objects.create(text=text, author=TagFeedTests.author)
+
+    def test_tags_and_mentions_saved(self):
+        """Теги и упоминания сохраняются вместе с постом."""
+        post = self.create_post('#Django для @Reader и @Author и @missing')
+        self.assertEqual(
+            list(post.tags.values_list('tag', 'pub_date')),
+            [('django', post.pub_date)],
+        )
+        self.assertEqual(
+            list(post.mentions.values_list('user__username', flat=True)),
+            ['Reader'],
+        )
+
+    def test_edit_changes_only_difference(self):
+        """Правка поста удаляет и добавляет только изменившиеся теги."""
+        post = self.create_post('#один #два @Reader')
+        kept = post.tags.get(tag='один')
+        self.author_client.post(
+            url_rev('posts:post_edit', post_id=post.pk),
+            data={'text': '#один #три', 'version': post.version},
+        )
+        self.assertEqual(
+            set(post.tags.values_list('tag', flat=True)), {'один', 'три'}
+        )
+        self.assertTrue(PostTag.objects.filter(pk=kept.pk).exists())
+        self.assertFalse(post.mentions.exists())
+
+    def test_tag_page(self):
+        """Страница тега показывает его посты, новые первыми."""
+        old = self.create_post('Старый #Тег')
+        new = self.create_post('Новый #тег')
+        self.create_post('Без тега')
+        deleted = self.create_post('Удалённый #тег')
+        Post.objects.filter(pk=deleted.pk).update(is_deleted=True)
+        response = self.guest_client.get(url_rev('posts:tag_posts', tag='ТЕГ'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.context['page_obj']), [new, old]
+        )
+
+    def test_mentions_page(self):
+        """Лента упоминаний - только для вошедших и только их посты."""
+        post = self.create_post('Привет, @Reader')
+        self.create_post('Привет всем')
+        response = self.reader_client.get(url_rev('posts:mentions'))
+        self.assertEqual(list(response.context['page_obj']), [post])
+        response = self.guest_client.get(url_rev('posts:mentions'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(BACKGROUND_JOBS_SYNC=True)
+    def test_bulk_delete_removes_tags(self):
+        """Массовое удаление постов удаляет их теги и упоминания."""
+        post = self.create_post('#тег @Reader')
+        start_job('test', bulk.delete_posts, Post.objects.filter(pk=post.pk))
+        self.assertFalse(PostTag.objects.filter(post_id=post.pk).exists())
+        self.assertFalse(
+            PostMention.objects.filter(post_id=post.pk).exists()
+        )
@@ -2,12 +2,14 @@ import tempfile
 import shutil
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase, override_settings
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
 from django.urls import reverse
 from django import forms
 from django.core.cache import cache
 
-from posts.models import Post, Follow
+from posts.models import Comment, Post, Follow
 from django.conf import settings
 
 from .fixtures.factories import post_create, group_create, url_rev
@@ -313,3 +315,135 @@ class FollowTest(TestCase):
             url_rev('posts:profile_unfollow', username=following)
         )
         self.assertEqual(Follow.objects.all().count(), 0)
+
+
+class ProfileTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user('Author')
+        cls.follower = User.objects.create_user('Follower')
+        cls.group = group_create()
+        for _ in range(12):
+            post_create(cls.author, cls.group, '')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def test_profile_stats(self):
+        """Профиль содержит число постов, подписчиков и статус подписки."""
+        url = url_rev('posts:profile', username=self.author.username)
+        response = self.follower_client.get(url)
+        author = response.context['author']
+        self.assertEqual(author.posts_count, 12)
+        self.assertEqual(author.followers_count, 1)
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['page_obj'].paginator.count, 12)
+        response = self.guest_client.get(url)
+        self.assertFalse(response.context['following'])
+
+    def test_profile_queries(self):
+        """Профиль загружается двумя запросами: автор и страница постов."""
+        url = url_rev('posts:profile', username=self.author.username)
+        with self.assertNumQueries(2):
+            self.guest_client.get(url)
+
+
+# Подмена прокси: запоминает ключи, которые сбросило бы приложение.
+PURGED_KEYS = []
+
+
+def record_purge(keys):
+    PURGED_KEYS.extend(keys)
+
+
+class EdgeCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user('Author')
+        cls.group = group_create()
+        cls.post = post_create(cls.author, cls.group, '')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def urls(self):
+        post = EdgeCacheTest.post
+        return {
+            url_rev('posts:index'): 'feed',
+            url_rev('posts:group_list', slug=post.group.slug):
+                f'group-{post.group_id}',
+            url_rev('posts:profile', username=post.author.username):
+                f'author-{post.author_id}',
+            url_rev('posts:post_detail', post_id=post.id):
+                f'post-{post.id}',
+        }
+
+    def test_anonymous_pages_are_public(self):
+        """Анонимам ленты отдаются без Vary: Cookie и с s-maxage."""
+        for url, key in self.urls().items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('s-maxage=', response['Cache-Control'])
+                self.assertNotIn('Cookie', response.get('Vary', ''))
+                self.assertIn(key, response['Surrogate-Key'].split())
+                self.assertFalse(response.cookies)
+
+    def test_authenticated_pages_are_private(self):
+        """Залогиненным пользователям страницы отдаются как private."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.author_client.get(url)
+                self.assertIn('private', response['Cache-Control'])
+                self.assertFalse(response.has_header('Surrogate-Key'))
+
+
+@override_settings(
+    EDGE_PURGE_URL='http://proxy.local/',
+    EDGE_PURGE_BACKEND='posts.tests.test_views.record_purge',
+)
+class EdgePurgeTest(TransactionTestCase):
+    def setUp(self) -> None:
+        PURGED_KEYS.clear()
+        self.author = User.objects.create_user('Author')
+        self.group = group_create()
+
+    def test_post_write_purges_pages(self):
+        """Изменение поста сбрасывает ленты, группу, автора и пост."""
+        post = post_create(self.author, self.group, '')
+        post_key = f'post-{post.id}'
+        expected = {
+            'feed', post_key, f'author-{self.author.id}',
+            f'group-{self.group.id}',
+        }
+        self.assertTrue(expected <= set(PURGED_KEYS))
+        PURGED_KEYS.clear()
+        post.delete()
+        self.assertIn(post_key, PURGED_KEYS)
+
+    def test_like_purges_pages(self):
+        """Лайк сбрасывает страницы, на которых виден его счётчик."""
+        post = post_create(self.author, self.group, '')
+        comment = Comment.objects.create(
+            text='Комментарий', author=self.author, post=post
+        )
+        client = Client()
+        client.force_login(self.author)
+        PURGED_KEYS.clear()
+        client.post(url_rev('posts:post_like', post_id=post.id))
+        self.assertTrue(
+            {'feed', f'post-{post.id}', f'group-{self.group.id}'}
+            <= set(PURGED_KEYS)
+        )
+        PURGED_KEYS.clear()
+        client.post(url_rev('posts:comment_like', comment_id=comment.id))
+        self.assertEqual(PURGED_KEYS, [f'post-{post.id}'])
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from core.counters import get_cache
+from posts.models import Post, ProfileStats
+from posts.visits import post_views, profile_visits
+
+from .fixtures.factories import url_rev
+
+User = get_user_model()
+
+
+class VisitCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user('Author')
+        cls.post = Post.objects.create(text='Текст поста', author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        get_cache().clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(VisitCounterTests.author)
+
+    def flush(self, counter):
+        counter.flush()
+        counter.flush()
+
+    def test_post_views(self):
+        """Просмотры поста копятся в буфере и видны сразу, кроме автора."""
+        url = url_rev('posts:post_detail', post_id=VisitCounterTests.post.pk)
+        for _ in range(3):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.context['post'].views_count, 3)
+        self.author_client.get(url)
+        post = Post.objects.get(pk=VisitCounterTests.post.pk)
+        self.assertEqual(post.views_count, 0)
+        with self.assertNumQueries(3):
+            self.flush(post_views)
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 3)
+
+    def test_profile_visits(self):
+        """Посещения профиля создают строку статистики при сбросе."""
+        url = url_rev('posts:profile', username='Author')
+        self.guest_client.get(url)
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context['author'].visits_count, 2)
+        self.assertFalse(ProfileStats.objects.exists())
+        self.flush(profile_visits)
+        self.assertEqual(
+            ProfileStats.objects.get(user=VisitCounterTests.author)
+            .visits_count, 2
+        )
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context['author'].visits_count, 3)
+
+    def test_stats_json(self):
+        """JSON со счётчиками поста и профиля."""
+        post = VisitCounterTests.post
+        self.guest_client.get(url_rev('posts:post_detail', post_id=post.pk))
+        self.guest_client.get(url_rev('posts:profile', username='Author'))
+        response = self.guest_client.get(
+            url_rev('posts:post_stats', post_id=post.pk)
+        )
+        self.assertEqual(response.json(), {
+            'id': post.pk, 'views': 1, 'likes': 0, 'comments': 0,
+        })
+        response = self.guest_client.get(
+            url_rev('posts:profile_stats', username='Author')
+        )
+        self.assertEqual(response.json(), {
+            'username': 'Author', 'visits': 1, 'posts': 1, 'followers': 0,
+        })
+        response = self.guest_client.get(
+            url_rev('posts:post_stats', post_id=1000)
+        )
+        self.assertEqual(response.status_code, 404)
@@ -1,26 +1,72 @@
 # from importlib.resources import path
 from django.urls import path
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     # главная страница
     path('', views.index, name='index'),
+    # Каталог групп
+    path('groups/', views.group_index, name='group_index'),
+    # RSS и Atom всех записей
+    path('rss/', feeds.latest_rss, name='feed_rss'),
+    path('atom/', feeds.latest_atom, name='feed_atom'),
     # <slug:название группы>
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
     # Профайл пользователя
     path('profile/<slug:username>/', views.profile, name='profile'),
+    path(
+        'profile/<slug:username>/rss/', feeds.author_rss, name='profile_rss'
+    ),
+    path(
+        'profile/<slug:username>/atom/',
+        feeds.author_atom,
+        name='profile_atom'
+    ),
+    path(
+        'profile/<slug:username>/stats/',
+        views.profile_stats,
+        name='profile_stats'
+    ),
     # Просмотр записи
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/stats/', views.post_stats, name='post_stats'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/delete/',
+        views.post_delete,
+        name='post_delete'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
+    path('posts/<int:post_id>/like/', views.post_like, name='post_like'),
+    path(
+        'comments/<int:comment_id>/like/',
+        views.comment_like,
+        name='comment_like'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    # Посты с хэштегом и посты с упоминанием текущего пользователя
+    path('tags/<str:tag>/', views.tag_posts, name='tag_posts'),
+    path('mentions/', views.mentions_index, name='mentions'),
+    # Число новых постов для плашки «Новых постов: N»
+    path('live/', views.live_index, name='live_index'),
+    path('live/group/<slug:slug>/', views.live_group, name='live_group'),
+    path('live/follow/', views.live_follow, name='live_follow'),
+    # Карта сайта
+    path('sitemap.xml', views.sitemap_index, name='sitemap'),
+    path(
+        'sitemaps/<str:section>/<int:number>.xml',
+        views.sitemap_segment,
+        name='sitemap_segment'
+    ),
     # Подписаться на автора
     path(
         'profile/<str:username>/follow/',
@@ -1,8 +1,62 @@
 from django.core.paginator import Paginator
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
+from .models import Follow, Post, ProfileStats, User
 
-def create_paginator(obj_list, page):
+# Ключ прокси-кэша для страниц со всеми постами сайта.
+FEED_SURROGATE_KEY = 'feed'
+
+
+def create_paginator(obj_list, page, count=None):
     paginator = Paginator(obj_list, 10)
+    if count is not None:
+        # Количество уже известно: paginator не будет делать COUNT.
+        paginator.count = count
     page_obj = paginator.get_page(page)
 
     return page_obj
+
+
+def count_subquery(queryset, field):
+    """Подзапрос с количеством строк queryset для внешней строки."""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+        field
+    ).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def visible_users():
+    """Пользователи, которые не удаляются в фоне (см. UserDeletion)."""
+    return User.objects.filter(deletion=None)
+
+
+def with_profile_stats(users, viewer):
+    """Добавляет к пользователям число постов, подписчиков и посещений
+    профиля и признак подписки на них пользователя viewer."""
+    visits = ProfileStats.objects.filter(
+        user=OuterRef('pk')
+    ).values('visits_count')
+    return users.annotate(
+        posts_count=count_subquery(Post.objects.all(), 'author'),
+        followers_count=count_subquery(Follow.objects.all(), 'author'),
+        visits_count=Coalesce(
+            Subquery(visits, output_field=IntegerField()), 0
+        ),
+        is_following=Exists(
+            Follow.objects.filter(user_id=viewer.pk, author=OuterRef('pk'))
+        ),
+    )
+
+
+def post_surrogate_keys(post, *group_ids):
+    """Ключи прокси-кэша страниц, на которых виден пост.
+
+    group_ids - дополнительные группы, например прежняя группа поста.
+    """
+    keys = [FEED_SURROGATE_KEY, f'post-{post.pk}', f'author-{post.author_id}']
+    keys += [
+        f'group-{group_id}'
+        for group_id in (post.group_id, *group_ids) if group_id
+    ]
+    return keys
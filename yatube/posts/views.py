@@ -1,15 +1,48 @@
 # views Отвечает за представление сайта
+import uuid
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+)
+from django.db.models import Count
+from django.forms.models import model_to_dict
+from django.template.loader import render_to_string
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
+from django.utils.http import is_safe_url
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
+
+from core.edge import (
+    drop_cached_page, edge_cache, purge, set_surrogate_keys
+)
+from core.ratelimit import ratelimit
+from core.streaming import render_page
 
-from .utils import create_paginator
+from . import live
+from .feeds import cached_pk
+from .likes import (
+    attach_likes, like_purge_keys, post_likes, toggle_like, with_likes
+)
+from .sitemaps import (
+    SECTIONS, get_closed_segment, is_closed, iter_index, iter_segment,
+    segment_count
+)
+from .stats import get_group_directory
+from .visits import count_visit, post_views, profile_visits
+from .utils import (
+    FEED_SURROGATE_KEY, create_paginator, visible_users, with_profile_stats
+)
 
-from .models import Post, Group, User, Comment, Follow
+from .models import ArchivedPost, Post, Group, Comment, Follow
 from .forms import PostForm, CommentForm
+from .services import create_comment, soft_delete_post, update_post
 
 
 # Главная страница
+@edge_cache
 @cache_page(20)
 def index(request):
     # выводит все объекты  класса POST из models
@@ -17,17 +50,30 @@ def index(request):
     page_obj = create_paginator(posts, request.GET.get('page'))
     # _obj обозначает что переменная содержит объект paginator
     title = 'Последние обновления на сайте'
+    with_likes(page_obj, request.user)
     context = {
         'title': title,
         'posts': posts,
         'page_obj': page_obj,
+        'live_poll_seconds': settings.LIVE_POLL_SECONDS,
     }
 
     template = 'posts/index.html'
+    response = render_page(request, template, context)
+    return set_surrogate_keys(response, FEED_SURROGATE_KEY)
+
+
+# Каталог групп со статистикой
+def group_index(request):
+    context = {
+        'groups': get_group_directory(),
+    }
+    template = 'posts/group_index.html'
     return render(request, template, context)
 
 
 # группа с постами
+@edge_cache
 def group_posts(request, slug):
     # slug-название группы переданное в URL
     group = get_object_or_404(Group, slug=slug)
@@ -35,56 +81,110 @@ def group_posts(request, slug):
     page_obj = create_paginator(posts, request.GET.get('page'))
 
     title = 'Здесь будет информация о группах проекта Yatube'
+    with_likes(page_obj, request.user)
     context = {
         'title': title,
         'group': group,
         'posts': posts,
         'page_obj': page_obj,
+        'live_poll_seconds': settings.LIVE_POLL_SECONDS,
     }
 
     template = 'posts/group_list.html'
-    return render(request, template, context)
+    response = render_page(request, template, context)
+    return set_surrogate_keys(response, f'group-{group.pk}')
 
 
 # Страница профайла пользователя: на ней будет отображаться
 # информация об авторе и его посты
+@edge_cache
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    author_posts = Post.objects.filter(author=user)
-    page_obj = create_paginator(author_posts, request.GET.get('page'))
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user, author=user
-        ).exists()
-    else:
-        following = False
+    # Автор, число его постов и подписчиков и признак подписки
+    # текущего пользователя загружаются одним запросом.
+    user = get_object_or_404(
+        with_profile_stats(visible_users(), request.user),
+        username=username,
+    )
+    author_posts = Post.objects.filter(author=user).select_related(
+        'author', 'group'
+    )
+    page_obj = create_paginator(
+        author_posts, request.GET.get('page'), count=user.posts_count
+    )
+    count_visit(profile_visits, request, user.pk, user.pk)
+    profile_visits.attach([user])
+    with_likes(page_obj, request.user)
     context = {
         'author': user,
         'page_obj': page_obj,
-        'following': following,
+        'following': user.is_following,
     }
 
     template = 'posts/profile.html'
-    return render(request, template, context)
+    response = render_page(request, template, context)
+    return set_surrogate_keys(response, f'author-{user.pk}')
 
 
 # Страница для просмотра отдельного поста
+@edge_cache
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    comment = Comment.objects.filter(post=post)
+    post = Post.objects.filter(id=post_id).first()
+    if post is None:
+        # Старые посты перенесены в архив: показываем их без формы
+        # комментария и без кнопок редактирования.
+        return archived_post_detail(request, post_id)
+    comment = Comment.objects.filter(post=post).select_related('author')
     form = CommentForm(request.POST or None)
+    attach_likes('post', [post], request.user)
+    count_visit(post_views, request, post.pk, post.author_id)
+    post_views.attach([post])
     context = {
         'post': post,
-        'comments': comment,
-        'form': form
+        'comments': attach_likes('comment', list(comment), request.user),
+        'form': form,
+        # Токен формы защищает от повторной отправки комментария.
+        'comment_token': uuid.uuid4().hex,
     }
 
     template = 'posts/post_detail.html'
-    return render(request, template, context)
+    response = render(request, template, context)
+    return set_surrogate_keys(
+        response, f'post-{post.pk}', f'author-{post.author_id}'
+    )
+
+
+# Счётчики поста в JSON
+def post_stats(request, post_id):
+    post = get_object_or_404(
+        Post.objects.annotate(comments_count=Count('comments')), pk=post_id
+    )
+    post_views.attach([post])
+    post_likes.attach([post])
+    return JsonResponse({
+        'id': post.pk,
+        'views': post.views_count,
+        'likes': post.likes_count,
+        'comments': post.comments_count,
+    })
+
+
+def archived_post_detail(request, post_id):
+    post = get_object_or_404(ArchivedPost, id=post_id)
+    context = {
+        'post': post,
+        'comments': post.comments.select_related('author'),
+        'is_archived': True,
+    }
+    template = 'posts/post_detail.html'
+    response = render(request, template, context)
+    return set_surrogate_keys(
+        response, f'post-{post.pk}', f'author-{post.author_id}'
+    )
 
 
 # Новая запись
 @login_required
+@ratelimit('post_create')
 def post_create(request):
     if request.method == 'POST':
         form = PostForm(
@@ -109,7 +209,7 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    if post.author != request.user:
+    if post.author_id != request.user.id:
         return redirect('posts:profile', request.user.username)
 
     form = PostForm(
@@ -117,50 +217,202 @@ def post_edit(request, post_id):
         files=request.FILES or None,
         instance=post
     )
+    # Версия поста, которую видел автор, когда открыл форму. Её нет
+    # только у клиентов, которые не знают о версиях (скрипты, тесты):
+    # их правка сохраняется без проверки. Испорченная версия - конфликт.
+    if request.POST:
+        version = request.POST.get('version', str(post.version))
+    else:
+        version = post.version
     if form.is_valid():  # form.is_valid проверка коректности данных
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
-        return redirect('posts:post_detail', str(post_id))
+        if version.isdigit() and update_post(form, int(version)):
+            return redirect('posts:post_detail', str(post_id))
+        # Показываем пост таким, какой он сейчас в базе, с его версией.
+        post = get_object_or_404(Post, pk=post_id)
+        form = PostForm(model_to_dict(post), instance=post)
+        form.is_valid()
+        form.add_error(
+            None,
+            'Пост уже изменили в другой вкладке. '
+            'Проверьте текущий текст и повторите правку.'
+        )
+        version = post.version
 
     context = {
         'form': form,
         'post': post,
         'is_edit': True,
+        'version': version,
     }
     template = 'posts/create_post.html'
     return render(request, template, context)
 
 
 @login_required
-def add_comment(request, post_id):
+@require_POST
+def post_delete(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
+    if post.author_id == request.user.id:
+        soft_delete_post(post)
+    return redirect('posts:profile', request.user.username)
+
+
+@login_required
+@ratelimit('add_comment')
+def add_comment(request, post_id):
+    # Пост не загружаем: для комментария нужен только его id.
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404('Пост не найден')
     form = CommentForm(request.POST or None)
+    comment = None
+    created = False
     if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
+        comment, created = create_comment(
+            form, request.user, post_id, request.POST.get('token')
+        )
+    if request.is_ajax():
+        # Ответ для вставки комментария на страницу без перезагрузки.
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        if comment is None:
+            # Повтор, пока первая отправка ещё сохраняется.
+            return JsonResponse({'pending': True}, status=409)
+        html = render_to_string(
+            'posts/includes/comment.html', {'comment': comment}, request
+        )
+        return JsonResponse(
+            {'id': comment.pk, 'html': html, 'created': created}
+        )
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def like(request, kind, model, pk):
+    obj = model.objects.filter(pk=pk).first()
+    if obj is None:
+        raise Http404
+    liked = toggle_like(kind, pk, request.user)
+    purge(*like_purge_keys(obj))
+    next_url = request.POST.get('next')
+    if not is_safe_url(next_url, {request.get_host()}, request.is_secure()):
+        next_url = reverse('posts:index')
+    # Главная в cache_page: иначе там осталось бы прежнее сердечко.
+    drop_cached_page(request, next_url)
+    if request.is_ajax():
+        obj = attach_likes(kind, [obj], request.user)[0]
+        return JsonResponse({'liked': liked, 'count': obj.likes_count})
+    return redirect(next_url)
+
+
+# Счётчики профиля в JSON
+def profile_stats(request, username):
+    user = get_object_or_404(
+        with_profile_stats(visible_users(), request.user),
+        username=username,
+    )
+    profile_visits.attach([user])
+    return JsonResponse({
+        'username': user.username,
+        'visits': user.visits_count,
+        'posts': user.posts_count,
+        'followers': user.followers_count,
+    })
+
+
+def live_response(request, scope):
+    since = request.GET.get('since', '')
+    if not since.isdigit():
+        return JsonResponse({'error': 'since'}, status=400)
+    return JsonResponse(live.new_posts(scope, int(since)))
+
+
+# Уведомления о новых постах на главной
+def live_index(request):
+    return live_response(request, live.site_scope())
+
+
+# Уведомления о новых постах группы
+def live_group(request, slug):
+    group_id = cached_pk(Group, 'slug', slug)
+    if group_id is None:
+        raise Http404
+    return live_response(request, live.group_scope(group_id))
+
+
+# Уведомления о новых постах избранных авторов
+@login_required
+def live_follow(request):
+    return live_response(request, live.follow_scope(request.user))
+
+
+# Поставить или снять лайк поста
+@login_required
+@require_POST
+@ratelimit('like')
+def post_like(request, post_id):
+    return like(request, 'post', Post, post_id)
+
+
+# Поставить или снять лайк комментария
+@login_required
+@require_POST
+@ratelimit('like')
+def comment_like(request, comment_id):
+    return like(request, 'comment', Comment, comment_id)
+
+
+# Посты с хэштегом: чтение по индексу (tag, -pub_date) таблицы PostTag
+@edge_cache
+def tag_posts(request, tag):
+    tag = tag.lower()
+    posts = Post.objects.filter(tags__tag=tag).select_related(
+        'author', 'group'
+    ).order_by('-tags__pub_date')
+    page_obj = create_paginator(posts, request.GET.get('page'))
+    with_likes(page_obj, request.user)
+    context = {
+        'tag': tag,
+        'page_obj': page_obj,
+    }
+    template = 'posts/tag.html'
+    response = render_page(request, template, context)
+    return set_surrogate_keys(response, FEED_SURROGATE_KEY)
+
+
+# Посты, в которых упомянут текущий пользователь
+@login_required
+def mentions_index(request):
+    posts = Post.objects.filter(mentions__user=request.user).select_related(
+        'author', 'group'
+    ).order_by('-mentions__pub_date')
+    page_obj = create_paginator(posts, request.GET.get('page'))
+    with_likes(page_obj, request.user)
+    context = {
+        'page_obj': page_obj,
+    }
+    template = 'posts/mentions.html'
+    return render_page(request, template, context)
+
+
 @login_required
 def follow_index(request):
     # информация о текущем пользователе доступна в переменной request.user
     list_post = Post.objects.filter(author__following__user=request.user)
     page_obj = create_paginator(list_post, request.GET.get('page'))
+    with_likes(page_obj, request.user)
     context = {
         'page_obj': page_obj,
+        'live_poll_seconds': settings.LIVE_POLL_SECONDS,
     }
     template = 'posts/follow.html'
-    return render(request, template, context)
+    return render_page(request, template, context)
 
 
 # Функция для подписки на автора поста
 @login_required
+@ratelimit('profile_follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
     user = request.user
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(visible_users(), username=username)
     is_following = Follow.objects.filter(user=user, author=author)
     if user != author and not is_following.exists():
         Follow.objects.create(user=user, author=author)
@@ -171,8 +423,32 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     user = request.user
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(visible_users(), username=username)
     is_follower = Follow.objects.filter(user=user, author=author)
     if is_follower:
         is_follower.delete()
     return redirect('posts:profile', username=author)
+
+
+# Индекс карты сайта: список сегментов всех разделов
+@edge_cache
+def sitemap_index(request):
+    base_url = request.build_absolute_uri('/').rstrip('/')
+    return HttpResponse(
+        ''.join(iter_index(base_url)), content_type='application/xml'
+    )
+
+
+# Сегмент карты сайта: закрытые отдаются из файла, открытый собирается
+@edge_cache
+def sitemap_segment(request, section, number):
+    if section not in SECTIONS or number >= segment_count(section):
+        raise Http404
+    base_url = request.build_absolute_uri('/').rstrip('/')
+    if is_closed(section, number):
+        path = get_closed_segment(base_url, section, number)
+        return FileResponse(open(path, 'rb'), content_type='application/xml')
+    return StreamingHttpResponse(
+        iter_segment(base_url, section, number),
+        content_type='application/xml',
+    )
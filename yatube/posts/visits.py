@@ -0,0 +1,22 @@
+# Просмотры постов и посещения профилей.
+#
+# Запись счётчика на каждый просмотр поставила бы все чтения страниц
+# в очередь за блокировкой записи SQLite. Просмотры копятся в буфере
+# (core/counters.py) и раз в COUNTER_FLUSH_INTERVAL секунд переносятся
+# в базу одним UPDATE на пачку. Если процесс упадёт, пропадут не больше
+# двух интервалов просмотров, а с общим кэшем (Redis, Memcached) -
+# только то, что не пережил сам кэш.
+from core.counters import BufferedCounter
+
+from .models import Post, ProfileStats
+
+post_views = BufferedCounter('post_views', Post, 'views_count')
+profile_visits = BufferedCounter(
+    'profile_visits', ProfileStats, 'visits_count', create=True
+)
+
+
+def count_visit(counter, request, pk, owner_id):
+    """Засчитывает просмотр, если смотрит не сам автор."""
+    if request.user.pk != owner_id:
+        counter.add(pk)
@@ -1,3 +1,17 @@
-# from django.contrib import admin
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+# Импорт регистрирует стандартный UserAdmin, который мы заменяем.
+from django.contrib.auth.admin import UserAdmin
 
-# Register your models here.
+from core.deletion import BackgroundDeleteAdminMixin
+from posts.services import schedule_user_deletion
+
+User = get_user_model()
+
+
+class BackgroundDeleteUserAdmin(BackgroundDeleteAdminMixin, UserAdmin):
+    schedule_deletion = staticmethod(schedule_user_deletion)
+
+
+admin.site.unregister(User)
+admin.site.register(User, BackgroundDeleteUserAdmin)
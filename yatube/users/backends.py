@@ -0,0 +1,38 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_KEY = 'users:user:{user_id}'
+USER_CACHE_TIMEOUT = 10 * 60
+
+
+def user_cache_key(user_id):
+    return USER_CACHE_KEY.format(user_id=user_id)
+
+
+def forget_cached_users(user_ids):
+    """Сбрасывает кэш пользователей после изменения в обход save()."""
+    cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    AuthenticationMiddleware вызывает get_user() на каждом запросе
+    залогиненного пользователя. Кэш сбрасывается при любом сохранении
+    пользователя (см. users/signals.py), в том числе при смене пароля,
+    поэтому проверка хэша сессии видит актуальный пароль.
+
+    QuerySet.update() и другие изменения в обход save() сигналов не
+    вызывают: после них нужно вызвать forget_cached_users(), иначе
+    заблокированный пользователь остаётся залогиненным до истечения
+    USER_CACHE_TIMEOUT.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,32 @@
+# Хэшеры паролей с настраиваемой стоимостью.
+#
+# Имена алгоритмов совпадают со стандартными, поэтому уже сохранённые
+# хэши проверяются этими классами. Если параметры в настройках
+# изменились, must_update() вернёт True и Django перехэширует пароль
+# при следующем входе пользователя.
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher
+)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2 с параметрами из настроек. Требует пакет argon2-cffi."""
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
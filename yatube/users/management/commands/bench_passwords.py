@@ -0,0 +1,43 @@
+import time
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет, сколько регистраций (проверка и хэширование пароля) '
+        'и входов (проверка хэша) в секунду выполняет одно ядро '
+        'с текущими настройками PASSWORD_HASHERS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20)
+
+    def measure(self, func, rounds):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return rounds / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        rounds = options['rounds']
+        password = 'correct-horse-battery-staple'
+        encoded = make_password(password)
+
+        def signup():
+            validate_password(password)
+            make_password(password)
+
+        def login():
+            check_password(password, encoded)
+
+        algorithm = encoded.split('$', 1)[0]
+        self.stdout.write(f'Хэшер: {algorithm}')
+        self.stdout.write(
+            f'Регистраций в секунду: {self.measure(signup, rounds):.1f}'
+        )
+        self.stdout.write(
+            f'Входов в секунду: {self.measure(login, rounds):.1f}'
+        )
@@ -1,3 +1,74 @@
-# from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .backends import CachedModelBackend, forget_cached_users
+
+User = get_user_model()
+
+
+class CachedModelBackendTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user('User', password='pass-1234')
+
+    def setUp(self):
+        cache.clear()
+        self.backend = CachedModelBackend()
+
+    def test_user_is_cached(self):
+        """Повторная загрузка пользователя не обращается к базе."""
+        self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_cache_invalidated_on_save(self):
+        """Изменение пользователя сбрасывает кэш."""
+        self.backend.get_user(self.user.pk)
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_cache_invalidated_after_update(self):
+        """После update() в обход save() кэш сбрасывается явно."""
+        self.backend.get_user(self.user.pk)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        forget_cached_users([self.user.pk])
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_password_change_logs_out_other_sessions(self):
+        """После смены пароля старая сессия недействительна."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('posts:index'))
+        self.assertTrue(response.context['user'].is_authenticated)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-pass-5678')
+        user.save()
+        response = client.get(reverse('about:author'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+
+class PasswordHasherTests(TestCase):
+    def test_password_rehashed_on_login(self):
+        """При изменении стоимости хэша пароль перехэшируется при входе."""
+        with override_settings(PBKDF2_ITERATIONS=1000):
+            user = User.objects.create_user('User', password='pass-1234')
+        self.assertIn('$1000$', user.password)
+        with override_settings(PBKDF2_ITERATIONS=2000):
+            self.assertTrue(
+                Client().login(username='User', password='pass-1234')
+            )
+        user.refresh_from_db()
+        self.assertIn('$2000$', user.password)
+
+    @override_settings(PBKDF2_ITERATIONS=1000)
+    def test_tuned_hasher_is_default(self):
+        """Новые пароли хэшируются настроенным хэшером."""
+        self.assertTrue(
+            make_password('pass-1234').startswith('pbkdf2_sha256$1000$')
+        )
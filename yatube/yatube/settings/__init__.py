@@ -0,0 +1,11 @@
+"""Выбор профиля настроек по переменной окружения DJANGO_ENV.
+
+``DJANGO_ENV=prod`` подключает yatube.settings.prod, любое другое
+значение (или его отсутствие) - yatube.settings.dev.
+"""
+import os
+
+if os.getenv('DJANGO_ENV', 'dev') == 'prod':
+    from .prod import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
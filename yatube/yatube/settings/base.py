@@ -0,0 +1,304 @@
+"""
+Django settings for yatube project.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+
+Общие настройки для всех окружений. Значения, которые отличаются
+между разработкой и продакшеном, читаются из переменных окружения
+и переопределяются в модулях dev.py и prod.py.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def env_bool(name, default=False):
+    """Читает булево значение из переменной окружения."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int(name, default):
+    """Читает целое число из переменной окружения."""
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    return int(value)
+
+
+def env_list(name, default=()):
+    """Читает список значений, разделённых запятыми."""
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'sorl.thumbnail',
+    'about.apps.AboutConfig',
+    'core.apps.CoreConfig',
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE = [
+    'core.edge.EdgeCacheMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.HtmlMinifyMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+                'core.context_processors.groups.groups',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        # Сколько секунд держать соединение открытым между запросами.
+        'CONN_MAX_AGE': env_int('DB_CONN_MAX_AGE', 0),
+        'OPTIONS': {
+            # Сколько секунд ждать освобождения блокировки SQLite.
+            'timeout': env_int('DB_TIMEOUT', 20),
+        },
+    }
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Хэшер новых паролей: 'pbkdf2' или 'argon2' (нужен пакет argon2-cffi).
+# Остальные хэшеры списка только проверяют старые пароли; при входе
+# такие пароли перехэшируются основным хэшером.
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+}
+if PASSWORD_HASHER not in PASSWORD_HASHER_CLASSES:
+    raise ImproperlyConfigured(
+        f'Неизвестный PASSWORD_HASHER {PASSWORD_HASHER!r}, допустимые '
+        f'значения: {", ".join(PASSWORD_HASHER_CLASSES)}.'
+    )
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CLASSES.items()
+    if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PBKDF2_ITERATIONS = env_int('PBKDF2_ITERATIONS', 150000)
+ARGON2_TIME_COST = env_int('ARGON2_TIME_COST', 2)
+# Память в КиБ.
+ARGON2_MEMORY_COST = env_int('ARGON2_MEMORY_COST', 512)
+ARGON2_PARALLELISM = env_int('ARGON2_PARALLELISM', 2)
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.getenv(
+    'STATIC_ROOT', os.path.join(BASE_DIR, 'collected_static')
+)
+
+# Пользователь сессии берётся из кэша, а не из базы на каждом запросе.
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+# Сессии читаются из кэша; в базу попадают только при записи.
+# Просроченные сессии удаляет команда clearsessions (запускать по cron).
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'
+)
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+# Сколько секунд браузер может не перепроверять картинки постов.
+MEDIA_MAX_AGE = env_int('MEDIA_MAX_AGE', 60 * 60)
+# Префикс internal-location nginx, например '/protected-media/'.
+# Если задан, файлы из MEDIA_ROOT отдаёт nginx через X-Accel-Redirect.
+MEDIA_ACCEL_REDIRECT = os.getenv('MEDIA_ACCEL_REDIRECT', '')
+# Посты старше этого числа дней команда archive_posts переносит в архив.
+POSTS_ARCHIVE_AFTER_DAYS = env_int('POSTS_ARCHIVE_AFTER_DAYS', 365)
+# Лимиты частоты запросов на запись: 'запросов/период' (s, m, h, d).
+RATELIMIT_ENABLED = env_bool('RATELIMIT_ENABLED', True)
+RATELIMITS = {
+    'post_create': os.getenv('RATELIMIT_POST_CREATE', '10/m'),
+    'add_comment': os.getenv('RATELIMIT_ADD_COMMENT', '20/m'),
+    'profile_follow': os.getenv('RATELIMIT_PROFILE_FOLLOW', '30/m'),
+    'like': os.getenv('RATELIMIT_LIKE', '60/m'),
+}
+# Заголовок с IP клиента за обратным прокси, например HTTP_X_REAL_IP или
+# HTTP_X_FORWARDED_FOR; пусто - берётся REMOTE_ADDR. Включать только
+# если прокси перезаписывает заголовок, иначе клиент подставит любой IP.
+RATELIMIT_IP_HEADER = os.getenv('RATELIMIT_IP_HEADER', '')
+# Сколько доверенных прокси дописывают адрес в X-Forwarded-For.
+RATELIMIT_TRUSTED_PROXIES = env_int('RATELIMIT_TRUSTED_PROXIES', 1)
+# Отдавать ленты потоком: <head> и шапка уходят до выборки постов.
+# Такие ответы не кэшируются cache_page.
+STREAMING_RENDER = env_bool('STREAMING_RENDER', False)
+# Сжимать пробелы и удалять комментарии в HTML-ответах.
+HTML_MINIFY = env_bool('HTML_MINIFY', False)
+# Сколько id покрывает один сегмент карты сайта (не больше 50000).
+SITEMAP_SEGMENT_SIZE = env_int('SITEMAP_SEGMENT_SIZE', 10000)
+# Каталог для собранных закрытых сегментов карты сайта.
+SITEMAP_ROOT = os.getenv('SITEMAP_ROOT', os.path.join(BASE_DIR, 'sitemaps'))
+# Сколько объектов массовые действия админки меняют в одной транзакции.
+BULK_CHUNK_SIZE = env_int('BULK_CHUNK_SIZE', 500)
+# Как часто (в секундах) страница ленты спрашивает о новых постах.
+LIVE_POLL_SECONDS = env_int('LIVE_POLL_SECONDS', 30)
+# Как часто (в секундах) счётчики из кэша переносятся в базу.
+COUNTER_FLUSH_INTERVAL = env_int('COUNTER_FLUSH_INTERVAL', 10)
+# Кэш для буфера счётчиков (см. CACHES).
+COUNTER_CACHE_ALIAS = 'counters'
+# Выполнять фоновые задачи сразу в запросе, без потока.
+BACKGROUND_JOBS_SYNC = env_bool('BACKGROUND_JOBS_SYNC', False)
+# Сколько секунд обратный прокси хранит страницы для анонимов.
+EDGE_CACHE_SECONDS = env_int('EDGE_CACHE_SECONDS', 60)
+# Адрес, на который отправляется PURGE при изменении постов.
+# Пустая строка - прокси не используется.
+EDGE_PURGE_URL = os.getenv('EDGE_PURGE_URL', '')
+EDGE_PURGE_BACKEND = 'core.edge.http_purge'
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+    # Буфер счётчиков (core/counters.py): отдельно от сессий и страниц,
+    # чтобы их вытеснение не теряло приращения. В продакшене - Redis
+    # или другой общий кэш без вытеснения.
+    COUNTER_CACHE_ALIAS: {
+        'BACKEND': os.getenv(
+            'COUNTER_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('COUNTER_CACHE_LOCATION', 'counters'),
+    },
+}
+if CACHES[COUNTER_CACHE_ALIAS]['BACKEND'].endswith('.LocMemCache'):
+    CACHES[COUNTER_CACHE_ALIAS]['OPTIONS'] = {'MAX_ENTRIES': 100000}
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'posts': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
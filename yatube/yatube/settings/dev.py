@@ -0,0 +1,21 @@
+"""Настройки для разработки и тестов."""
+from .base import *  # noqa: F401,F403
+from .base import env_bool, env_list, os
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.getenv(
+    'SECRET_KEY', '_4vvu*_rpb45_1+tk=akaum@*mzcxh0oc^h6%8v^w91jwbusi#'
+)
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = env_bool('DEBUG', True)
+
+ALLOWED_HOSTS = env_list('ALLOWED_HOSTS', [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+])
@@ -0,0 +1,64 @@
+"""Настройки для продакшена.
+
+Всё, что зависит от окружения, задаётся переменными окружения:
+SECRET_KEY, ALLOWED_HOSTS, DB_NAME, DB_CONN_MAX_AGE, DB_TIMEOUT,
+CACHE_BACKEND, CACHE_LOCATION, COUNTER_CACHE_BACKEND, COUNTER_CACHE_LOCATION,
+STATIC_ROOT, MEDIA_ROOT, MEDIA_MAX_AGE,
+MEDIA_ACCEL_REDIRECT, LOG_LEVEL.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import (
+    CACHES, COUNTER_CACHE_ALIAS, DATABASES, MIDDLEWARE, TEMPLATES, env_int,
+    env_list, os
+)
+
+SECRET_KEY = os.getenv('SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Задайте переменную окружения SECRET_KEY.')
+
+# Без DEBUG Django не сохраняет выполненные SQL-запросы
+# в connection.queries и не собирает отладочный контекст.
+DEBUG = False
+
+ALLOWED_HOSTS = env_list('ALLOWED_HOSTS')
+
+# LocMemCache у каждого воркера свой и вытесняет записи: приращения
+# лайков и просмотров терялись бы.
+if CACHES[COUNTER_CACHE_ALIAS]['BACKEND'].endswith('.LocMemCache'):
+    raise ImproperlyConfigured(
+        'Задайте COUNTER_CACHE_BACKEND: буферу счётчиков нужен общий кэш '
+        'без вытеснения (например, Redis), а не LocMemCache.'
+    )
+
+# Постоянные соединения с базой вместо нового соединения на запрос.
+DATABASES['default']['CONN_MAX_AGE'] = env_int('DB_CONN_MAX_AGE', 60)
+
+# Шаблоны компилируются один раз на процесс и берутся из памяти.
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    processor
+    for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+    if processor != 'django.template.context_processors.debug'
+]
+
+# Статику отдаёт WhiteNoise сразу после SecurityMiddleware.
+security_index = MIDDLEWARE.index(
+    'django.middleware.security.SecurityMiddleware'
+)
+MIDDLEWARE = MIDDLEWARE[:security_index + 1] + [
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+] + MIDDLEWARE[security_index + 1:]
+
+# collectstatic добавляет к именам файлов хэш содержимого и сохраняет
+# рядом сжатые .gz (и .br, если установлен Brotli) версии. Файлы
+# с хэшем WhiteNoise отдаёт с Cache-Control: max-age=315360000, immutable.
+STATICFILES_STORAGE = (
+    'whitenoise.storage.CompressedManifestStaticFilesStorage'
+)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Компилируем шаблоны и строим URL-резолвер до первого запроса.
+from core.warmup import warm_up  # noqa: E402
+
+warm_up()